@@ -19,6 +19,8 @@ from jx_mysql.mysql import (
     quote_column,
     quote_value,
     quote_list,
+    quote_row,
+    quote_values,
     sql_alias,
     _esfilter2sqlwhere,
 )
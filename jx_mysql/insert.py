@@ -272,19 +272,10 @@ class Facts(jx_base.Facts):
                 meta_columns = [UID, PARENT, ORDER]
 
             all_columns = tuple(meta_columns + column_names)
-            command = ConcatSQL(
-                SQL_INSERT,
-                quote_column(table_name),
-                sql_iso(sql_list(map(quote_column, all_columns))),
-                SQL_VALUES,
-                sql_list(
-                    sql_iso(sql_list(quote_value(row.get(c)) for c in all_columns))
-                    for row in from_data(rows)
-                ),
-            )
+            values = [[row.get(c) for c in all_columns] for row in from_data(rows)]
 
             with self.container.db.transaction() as t:
-                t.execute(command)
+                t.insert_rows(table_name, all_columns, values)
 
 
 class Insertion:
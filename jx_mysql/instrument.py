@@ -0,0 +1,409 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+import os
+import queue
+import re
+from bisect import bisect_left
+from collections import deque
+from random import random
+from time import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mo_dots import Data, coalesce
+from mo_json import json2value, value2json
+from mo_logs import Except, Log
+from mo_threads import Lock, Thread
+
+from jx_mysql.settings import to_settings
+
+DEBUG = False
+MAX_SCAN = 2000  # CHARACTERS OF SQL LOOKED AT TO MAKE A FINGERPRINT
+MAX_EXPLAIN_WAITING = 100  # SLOW STATEMENTS WAITING FOR EXPLAIN; MORE ARE KEPT WITHOUT A PLAN
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)  # SECONDS
+
+_comment = re.compile(r"/\*(?![!+]).*?(?:\*/|$)|(?:--\s|#)[^\n]*", re.DOTALL)
+_literal = re.compile(
+    r"(`(?:[^`]|``)*(?:`|$))"
+    r"|(/\*(?![!+]).*?(?:\*/|$)|(?:--\s|#)[^\n]*)"
+    r"|'(?:[^'\\]|\\.|'')*(?:'|$)"
+    r"|\"(?:[^\"\\]|\\.|\"\")*(?:\"|$)"
+    r"|\b0x[0-9a-fA-F]+\b"
+    r"|\b\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b"
+    r"|\bNULL\b",
+    re.DOTALL | re.IGNORECASE,
+)
+_list = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*(?:\s*,\s*(?:\([^)]*)?$)?")
+_space = re.compile(r"\s+")
+_explainable = re.compile(r"^\s*(?:SELECT|UPDATE|DELETE|WITH|TABLE|\(|(?:INSERT|REPLACE)\b.*\bSELECT\b)", re.IGNORECASE | re.DOTALL)
+
+
+def fingerprint(sql, max_length=200):
+    """
+    :return: sql WITH LITERALS REPLACED BY ?, AND LISTS OF VALUES COLLAPSED, SO
+             STATEMENTS FROM THE SAME TEMPLATE LOOK THE SAME
+    """
+    sql = _literal.sub(_replace, sql[:MAX_SCAN])
+    sql = _list.sub("(...)", sql)
+    sql = _space.sub(" ", sql).strip()
+    if len(sql) > max_length:
+        return sql[: max_length - 3] + "..."
+    return sql
+
+
+def _replace(match):
+    """
+    KEEP QUOTED NAMES, DROP COMMENTS, AND REPLACE LITERALS WITH ?
+    """
+    name, comment = match.groups()
+    if name is not None:
+        return name
+    if comment is not None:
+        return " "
+    return "?"
+
+
+class Instrument(object):
+    """
+    GIVEN TO MySql(instrument=...) TO SEE EVERY STATEMENT SENT
+    """
+
+    def statement(self, db, sql, duration, rows, num_bytes, mode):
+        """
+        CALLED AFTER EACH STATEMENT HAS RUN
+        :param db: THE MySql THAT SENT THE STATEMENT
+        :param sql: THE STATEMENT
+        :param duration: SECONDS TO RUN (AND READ THE RESULT)
+        :param rows: ROWS RETURNED, OR ROWS AFFECTED
+        :param num_bytes: BYTES OF SQL SENT
+        :param mode: "direct" IF SENT ALONE, "backlog" IF SENT IN A BATCH
+        """
+        pass
+
+
+class Metrics(Instrument):
+    """
+    IN-PROCESS HISTOGRAMS, PER STATEMENT FINGERPRINT, IN PROMETHEUS TEXT FORMAT
+    """
+
+    def __init__(self, buckets=BUCKETS, max_series=1000, max_length=200, prefix="jx_mysql"):
+        """
+        :param buckets: UPPER BOUNDS (SECONDS) OF THE LATENCY HISTOGRAM
+        :param max_series: MAXIMUM NUMBER OF FINGERPRINTS; THE REST ARE COUNTED AS "other"
+        :param max_length: MAXIMUM LENGTH OF A FINGERPRINT
+        :param prefix: PREFIX OF THE METRIC NAMES
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.max_series = max_series
+        self.max_length = max_length
+        self.prefix = prefix
+        self.locker = Lock("mysql metrics")
+        self.series = {}  # MAP FROM (fingerprint, mode) TO _Series
+        self.server = None
+
+    def statement(self, db, sql, duration, rows, num_bytes, mode):
+        key = fingerprint(sql, self.max_length), mode
+        with self.locker:
+            series = self.series.get(key)
+            if series is None:
+                if len(self.series) >= self.max_series:
+                    key = "other", mode
+                    series = self.series.get(key)
+                if series is None:
+                    series = self.series[key] = _Series(len(self.buckets))
+            series.counts[bisect_left(self.buckets, duration)] += 1
+            series.count += 1
+            series.seconds += duration
+            series.rows += rows or 0
+            series.bytes += num_bytes
+
+    def text(self):
+        """
+        :return: ALL METRICS, IN PROMETHEUS TEXT EXPOSITION FORMAT
+        """
+        name = self.prefix + "_statement"
+        with self.locker:
+            series = [(k, s.counts[:], s.count, s.seconds, s.rows, s.bytes) for k, s in self.series.items()]
+        series.sort(key=lambda s: -s[3])
+
+        output = [
+            "# HELP " + name + "_seconds Time to run statements, by fingerprint",
+            "# TYPE " + name + "_seconds histogram",
+        ]
+        for (fp, mode), counts, count, seconds, _, _ in series:
+            labels = 'fingerprint="' + _escape(fp) + '",mode="' + mode + '"'
+            total = 0
+            for bound, c in zip(self.buckets, counts):
+                total += c
+                output.append(name + "_seconds_bucket{" + labels + ',le="' + _number(bound) + '"} ' + str(total))
+            output.append(name + "_seconds_bucket{" + labels + ',le="+Inf"} ' + str(count))
+            output.append(name + "_seconds_sum{" + labels + "} " + _number(seconds))
+            output.append(name + "_seconds_count{" + labels + "} " + str(count))
+
+        for index, metric, help in ((4, "rows", "Rows returned or affected"), (5, "bytes", "Bytes of SQL sent")):
+            output.append("# HELP " + name + "_" + metric + "_total " + help + ", by fingerprint")
+            output.append("# TYPE " + name + "_" + metric + "_total counter")
+            for s in series:
+                fp, mode = s[0]
+                labels = 'fingerprint="' + _escape(fp) + '",mode="' + mode + '"'
+                output.append(name + "_" + metric + "_total{" + labels + "} " + str(s[index]))
+        output.append("")
+        return "\n".join(output)
+
+    def write(self, filename):
+        """
+        WRITE text() TO FILE (REPLACED ATOMICALLY, FOR THE node_exporter TEXTFILE COLLECTOR)
+        """
+        temp = filename + ".tmp"
+        with open(temp, "w", encoding="utf8") as file:
+            file.write(self.text())
+        os.replace(temp, filename)
+
+    def serve(self, port, host="localhost"):
+        """
+        SERVE text() OVER HTTP, ON A DAEMON THREAD, UNTIL close()
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                content = metrics.text().encode("utf8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                DEBUG and Log.note("metrics request: " + (format % args))
+
+        self.server = server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+
+        def worker(please_stop):
+            please_stop.then(server.shutdown)
+            server.serve_forever()
+
+        Thread.run("mysql metrics on port " + str(port), worker)
+        return self
+
+    def close(self):
+        server, self.server = self.server, None
+        if server:
+            server.shutdown()
+            server.server_close()
+
+
+class SqlLog(Instrument):
+    """
+    LOG THE FINGERPRINT OF A SAMPLE OF STATEMENTS, AT A LIMITED RATE
+    """
+
+    def __init__(self, sample=1.0, per_second=1.0, max_length=200):
+        """
+        :param sample: FRACTION OF STATEMENTS CONSIDERED FOR LOGGING
+        :param per_second: MAXIMUM LOG LINES PER SECOND (BURSTS OF UP TO ONE SECOND ALLOWED)
+        :param max_length: MAXIMUM LENGTH OF A FINGERPRINT
+        """
+        self.sample = sample
+        self.per_second = per_second
+        self.max_length = max_length
+        self.locker = Lock("sql log")
+        self.allowance = per_second
+        self.last = time()
+        self.skipped = 0  # STATEMENTS SAMPLED, BUT NOT LOGGED, SINCE LAST LOG LINE
+
+    def statement(self, db, sql, duration, rows, num_bytes, mode):
+        if self.sample < 1 and random() >= self.sample:
+            return
+        with self.locker:
+            now = time()
+            self.allowance = min(self.per_second, self.allowance + (now - self.last) * self.per_second)
+            self.last = now
+            if self.allowance < 1:
+                self.skipped += 1
+                return
+            self.allowance -= 1
+            skipped, self.skipped = self.skipped, 0
+
+        Log.note(
+            "{{mode}} SQL ({{duration|round(places=3)}} sec, {{rows}} rows, {{bytes}} bytes"
+            + (", {{skipped}} more not logged" if skipped else "")
+            + "): {{sql}}",
+            mode=mode,
+            duration=duration,
+            rows=rows,
+            bytes=num_bytes,
+            skipped=skipped,
+            sql=fingerprint(sql, self.max_length),
+        )
+
+
+class SlowQueryLog(Instrument):
+    """
+    KEEP THE STATEMENTS THAT TAKE LONGER THAN threshold, WITH THEIR PLAN
+    """
+
+    def __init__(self, threshold=1.0, size=100, filename=None, explain=True, max_length=200):
+        """
+        :param threshold: SECONDS BEFORE A STATEMENT IS SLOW
+        :param size: NUMBER OF SLOW STATEMENTS KEPT IN MEMORY
+        :param filename: OPTIONAL FILE TO APPEND SLOW STATEMENTS TO, ONE JSON PER LINE
+        :param explain: RUN EXPLAIN FORMAT=JSON FOR EACH SLOW STATEMENT, ON ANOTHER THREAD
+                        AND CONNECTION, BUT ON THE SAME HOST (PRIMARY OR REPLICA) AS THE STATEMENT
+        :param max_length: MAXIMUM LENGTH OF A FINGERPRINT
+        """
+        self.threshold = threshold
+        self.filename = filename
+        self.explain = explain
+        self.max_length = max_length
+        self.locker = Lock("slow query log")
+        self.slow = deque(maxlen=size)
+        self.connections = {}  # MAP FROM (host, port) TO CONNECTION USED FOR EXPLAIN
+        self.waiting = queue.Queue(MAX_EXPLAIN_WAITING)  # (entry, settings, schema, sql) TO EXPLAIN
+        self.worker = None
+
+    def statement(self, db, sql, duration, rows, num_bytes, mode):
+        if duration < self.threshold:
+            return
+        entry = Data(
+            timestamp=time(),
+            fingerprint=fingerprint(sql, self.max_length),
+            duration=duration,
+            rows=rows,
+            bytes=num_bytes,
+            mode=mode,
+        )
+        if self.explain and db is not None and _explainable.match(_comment.sub(" ", sql[:MAX_SCAN])):
+            # THE CALLER DOES NOT WAIT FOR THE PLAN; THE ENTRY IS KEPT ONCE EXPLAINED
+            try:
+                self.waiting.put_nowait((entry, db._host_settings(), db.schema, sql))
+                self._start()
+                return
+            except queue.Full:
+                entry.explain_error = "Too many slow statements waiting for EXPLAIN"
+        self._keep(entry)
+
+    def recent(self):
+        """
+        :return: THE SLOW STATEMENTS KEPT, OLDEST FIRST
+        """
+        with self.locker:
+            return list(self.slow)
+
+    def close(self):
+        """
+        EXPLAIN THE STATEMENTS WAITING, THEN CLOSE THE CONNECTIONS
+        """
+        with self.locker:
+            worker, self.worker = self.worker, None
+        if worker:
+            self.waiting.put(None)
+            worker.join()
+        with self.locker:
+            connections, self.connections = self.connections, {}
+        for c in connections.values():
+            try:
+                c.close()
+            except Exception as cause:
+                DEBUG and Log.note("problem closing connection", cause=cause)
+
+    def _keep(self, entry):
+        with self.locker:
+            self.slow.append(entry)
+            if self.filename:
+                with open(self.filename, "a", encoding="utf8") as file:
+                    file.write(value2json(entry) + "\n")
+
+    def _start(self):
+        with self.locker:
+            if self.worker is None:
+                self.worker = Thread.run("slow query explain", self._explain_waiting)
+
+    def _explain_waiting(self, please_stop):
+        while not please_stop:
+            try:
+                todo = self.waiting.get(timeout=1)
+            except queue.Empty:
+                continue
+            if todo is None:
+                return
+            entry, settings, schema, sql = todo
+            try:
+                entry.explain = self._explain(settings, schema, sql)
+            except Exception as cause:
+                entry.explain_error = Except.wrap(cause).message
+            self._keep(entry)
+
+    def _explain(self, settings, schema, sql):
+        from jx_mysql.mysql import _connect, quote_column
+
+        key = settings.host, settings.port
+        with self.locker:
+            connection = self.connections.pop(key, None)
+        if connection is None:
+            connection = _connect(settings)
+        try:
+            with connection.cursor() as cursor:
+                if schema and connection.session.get("schema") != schema:
+                    cursor.execute("USE" + str(quote_column(schema)))
+                    connection.session["schema"] = schema
+                cursor.execute("EXPLAIN FORMAT=JSON " + sql)
+                plan = cursor.fetchone()[0]
+            connection.rollback()
+        except Exception as cause:
+            connection.close()
+            raise cause
+        with self.locker:
+            self.connections.setdefault(key, connection)
+        return json2value(plan)
+
+
+class _Series(object):
+    __slots__ = ["counts", "count", "seconds", "rows", "bytes"]
+
+    def __init__(self, num_buckets):
+        self.counts = [0] * (num_buckets + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def new_sql_log(settings):
+    """
+    :param settings: SqlLog PARAMETERS, OR True FOR DEFAULTS
+    """
+    settings = to_settings(settings)
+    return SqlLog(
+        sample=coalesce(settings.sample, 1.0),
+        per_second=coalesce(settings.per_second, 1.0),
+        max_length=coalesce(settings.max_length, 200),
+    )
+
+
+def new_slow_log(settings):
+    """
+    :param settings: SlowQueryLog PARAMETERS, OR True FOR DEFAULTS
+    """
+    settings = to_settings(settings)
+    return SlowQueryLog(
+        threshold=coalesce(settings.threshold, 1.0),
+        size=coalesce(settings.size, 100),
+        filename=settings.filename,
+        explain=coalesce(settings.explain, True),
+        max_length=coalesce(settings.max_length, 200),
+    )
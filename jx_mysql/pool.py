@@ -0,0 +1,238 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from time import time
+
+from mo_dots import Data, coalesce
+from mo_logs import Log
+from mo_threads import Lock, Till
+
+from jx_mysql.settings import to_settings
+
+DEBUG = False
+
+pools = {}  # MAP FROM CONNECTION KEY TO ConnectionPool
+pools_locker = Lock("mysql pools")
+
+
+class ConnectionPool(object):
+    """
+    BOUNDED SET OF LIVE CONNECTIONS, SHARED BY MANY MySql INSTANCES
+    """
+
+    def __init__(
+        self,
+        connect,
+        max_size=10,
+        idle_timeout=60,
+        max_lifetime=60 * 60,
+        check_after=1,
+        timeout=60,
+        name="mysql pool",
+    ):
+        """
+        :param connect: FUNCTION THAT RETURNS A NEW CONNECTION
+        :param max_size: MAXIMUM NUMBER OF CONNECTIONS (IDLE AND IN USE)
+        :param idle_timeout: SECONDS AN IDLE CONNECTION IS KEPT BEFORE IT IS CLOSED
+        :param max_lifetime: SECONDS BEFORE A CONNECTION IS RECYCLED
+        :param check_after: SECONDS IDLE BEFORE A CONNECTION IS ping()ED ON CHECKOUT
+        :param timeout: SECONDS TO WAIT FOR A FREE CONNECTION
+        """
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.timeout = timeout
+        self.name = name
+
+        self.locker = Lock(name)
+        self.idle = []  # LIST OF _Entry, MOST RECENTLY USED AT THE END
+        self.busy = {}  # MAP FROM id(connection) TO _Entry
+        self.opening = 0  # NUMBER OF CONNECTIONS BEING MADE
+        self.waiting = 0  # NUMBER OF THREADS WAITING FOR A CONNECTION
+
+        self.num_checkout = 0
+        self.num_created = 0
+        self.num_closed = 0
+        self.total_wait = 0
+        self.max_wait = 0
+
+    def checkout(self):
+        """
+        :return: A LIVE CONNECTION, WHICH MUST BE GIVEN BACK WITH checkin()
+        """
+        start = time()
+        till = Till(seconds=self.timeout)
+        while True:
+            entry = None
+            with self.locker:
+                expired = self._expired_idle(start)
+                while True:
+                    if self.idle:
+                        entry = self.idle.pop()
+                        self.busy[id(entry.connection)] = entry
+                        break
+                    elif len(self.busy) + self.opening < self.max_size:
+                        self.opening += 1
+                        break
+                    self.waiting += 1
+                    try:
+                        if not self.locker.wait(till=till):
+                            Log.error(
+                                "Waited {{timeout}} seconds for a connection from {{name|quote}}",
+                                timeout=self.timeout,
+                                name=self.name,
+                            )
+                    finally:
+                        self.waiting -= 1
+            self._close_all(expired)
+
+            if entry is None:
+                try:
+                    entry = _Entry(self.connect())
+                finally:
+                    with self.locker:
+                        self.opening -= 1
+                        if entry:
+                            self.num_created += 1
+                            self.busy[id(entry.connection)] = entry
+                self._done_waiting(start)
+                return entry.connection
+
+            now = time()
+            if now - entry.created > self.max_lifetime:
+                self._discard(entry)
+                continue
+            if now - entry.last_used > self.check_after:
+                try:
+                    entry.connection.ping(reconnect=False)
+                except Exception as cause:
+                    DEBUG and Log.note("dropping dead connection", cause=cause)
+                    self._discard(entry)
+                    continue
+            self._done_waiting(start)
+            return entry.connection
+
+    def checkin(self, connection):
+        """
+        RETURN CONNECTION TO THE POOL
+        """
+        with self.locker:
+            entry = self.busy.pop(id(connection), None)
+            if entry is None:
+                Log.error("Connection does not belong to {{name|quote}}", name=self.name)
+            now = time()
+            if connection.open and now - entry.created < self.max_lifetime:
+                entry.last_used = now
+                self.idle.append(entry)
+                return
+        self._close_all([entry])
+
+    def discard(self, connection):
+        """
+        REMOVE A BROKEN CONNECTION FROM THE POOL
+        """
+        with self.locker:
+            entry = self.busy.pop(id(connection), None)
+        if entry:
+            self._close_all([entry])
+
+    def stats(self):
+        """
+        :return: CURRENT POOL USAGE, AND WAIT TIMES (IN SECONDS)
+        """
+        with self.locker:
+            return Data(
+                name=self.name,
+                max_size=self.max_size,
+                in_use=len(self.busy),
+                idle=len(self.idle),
+                opening=self.opening,
+                waiting=self.waiting,
+                checkouts=self.num_checkout,
+                created=self.num_created,
+                closed=self.num_closed,
+                total_wait=self.total_wait,
+                max_wait=self.max_wait,
+                average_wait=self.total_wait / self.num_checkout if self.num_checkout else 0,
+            )
+
+    def close(self):
+        """
+        CLOSE ALL IDLE CONNECTIONS; BUSY CONNECTIONS ARE CLOSED WHEN RETURNED
+        """
+        with self.locker:
+            idle, self.idle = self.idle, []
+            self.max_lifetime = 0
+        self._close_all(idle)
+
+    def _expired_idle(self, now):
+        # MUST BE CALLED WITH LOCK
+        expired = []
+        keep = []
+        for e in self.idle:
+            if now - e.last_used > self.idle_timeout or now - e.created > self.max_lifetime:
+                expired.append(e)
+            else:
+                keep.append(e)
+        self.idle = keep
+        return expired
+
+    def _discard(self, entry):
+        with self.locker:
+            self.busy.pop(id(entry.connection), None)
+        self._close_all([entry])
+
+    def _close_all(self, entries):
+        for e in entries:
+            try:
+                e.connection.close()
+            except Exception as cause:
+                DEBUG and Log.note("problem closing connection", cause=cause)
+        if entries:
+            with self.locker:
+                self.num_closed += len(entries)
+
+    def _done_waiting(self, start):
+        wait = time() - start
+        with self.locker:
+            self.num_checkout += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+
+class _Entry(object):
+    __slots__ = ["connection", "created", "last_used"]
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.last_used = time()
+
+
+def get_pool(key, connect, settings):
+    """
+    :param key: HASHABLE IDENTITY OF THE DATABASE AND USER
+    :param connect: FUNCTION THAT RETURNS A NEW CONNECTION
+    :param settings: POOL PARAMETERS (SEE ConnectionPool), OR True FOR DEFAULTS
+    :return: THE ConnectionPool SHARED BY ALL WITH THE SAME key
+    """
+    with pools_locker:
+        pool = pools.get(key)
+        if pool is None:
+            settings = to_settings(settings)
+            pool = pools[key] = ConnectionPool(
+                connect,
+                max_size=coalesce(settings.max_size, 10),
+                idle_timeout=coalesce(settings.idle_timeout, 60),
+                max_lifetime=coalesce(settings.max_lifetime, 60 * 60),
+                check_after=coalesce(settings.check_after, 1),
+                timeout=coalesce(settings.timeout, 60),
+                name="mysql pool for " + str(key[0]),
+            )
+        return pool
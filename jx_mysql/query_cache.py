@@ -0,0 +1,302 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+import re
+from collections import OrderedDict
+from time import time
+
+from mo_dots import Data, coalesce
+from mo_logs import Log
+from mo_threads import Lock
+
+from jx_mysql.settings import to_settings
+
+DEBUG = False
+
+_literal = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"", re.DOTALL)
+_comment = re.compile(r"/\*.*?\*/|(?:--\s|#)[^\n]*", re.DOTALL)
+_word = re.compile(r"`((?:[^`]|``)+)`|([A-Za-z_$][\w$]*)")
+_name = r"(?:`(?:[^`]|``)+`|[\w$]+)(?:\s*\.\s*(?:`(?:[^`]|``)+`|[\w$]+))?"
+_write = re.compile(
+    r"(?:^|;)\s*(INSERT|REPLACE|UPDATE|DELETE|LOAD|TRUNCATE|CREATE|ALTER|DROP|RENAME|CALL)\b",
+    re.IGNORECASE,
+)
+_ddl = {"CREATE", "ALTER", "DROP", "RENAME", "TRUNCATE"}
+_target = re.compile(
+    r"\b(?:INTO(?:\s+TABLE)?|UPDATE|DELETE\s+FROM|TRUNCATE|TABLE(?:\s+IF(?:\s+NOT)?\s+EXISTS)?)\s+(" + _name + ")",
+    re.IGNORECASE,
+)
+_readable = re.compile(r"^\s*(?:SELECT|SHOW|DESC|DESCRIBE|EXPLAIN|WITH|\()", re.IGNORECASE)
+_volatile = re.compile(
+    r"\b(?:FOR\s+UPDATE|LOCK\s+IN\s+SHARE\s+MODE|FOR\s+SHARE|RAND|UUID|UUID_SHORT|SLEEP|"
+    r"LAST_INSERT_ID|FOUND_ROWS|ROW_COUNT|GET_LOCK|RELEASE_LOCK|CONNECTION_ID|SYSDATE|INTO\s+@)\b",
+    re.IGNORECASE,
+)
+
+
+class QueryCache(object):
+    """
+    LEAST-RECENTLY-USED CACHE OF QUERY RESULTS (header AND ROW TUPLES)
+
+    ENTRIES ARE DROPPED WHEN
+    * THEY ARE OLDER THAN ttl SECONDS
+    * A WRITE THROUGH THE OWNING MySql MENTIONS A TABLE THE QUERY USES
+    * information_schema.tables.UPDATE_TIME OF A TABLE THE QUERY USES CHANGES
+      (CHECKED AT MOST ONCE EVERY check_after SECONDS)
+
+    THE UPDATE_TIME CHECK COSTS AN EXTRA ROUND TRIP TO information_schema ON
+    EVERY MISS, AND ON HITS WHEN check_after HAS PASSED. IT IS ALSO UNRELIABLE:
+    MySQL 8 CACHES TABLE STATISTICS FOR information_schema_stats_expiry
+    SECONDS (DEFAULT 86400), AND InnoDB FORGETS UPDATE_TIME ON RESTART, SO
+    WRITES FROM OTHER CLIENTS CAN GO UNSEEN FOR THAT LONG. ONLY WRITES THROUGH
+    THE OWNING MySql, AND ttl, ARE DEPENDABLE; USE check_after=False TO SKIP
+    THE CHECK WHEN OTHER CLIENTS DO NOT WRITE, OR WHEN ttl IS SHORT ENOUGH
+    """
+
+    def __init__(
+        self,
+        max_entries=1000,
+        max_bytes=10 * 1024 * 1024,
+        ttl=60,
+        check_after=1,
+        name="query cache",
+    ):
+        """
+        :param max_entries: MAXIMUM NUMBER OF RESULTS KEPT
+        :param max_bytes: MAXIMUM (ESTIMATED) SIZE OF ALL RESULTS KEPT
+        :param ttl: SECONDS A RESULT IS KEPT
+        :param check_after: SECONDS BEFORE UPDATE_TIME IS CHECKED AGAIN (False TO NEVER CHECK)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.check_after = check_after
+        self.name = name
+
+        self.locker = Lock(name)
+        self.entries = OrderedDict()  # MAP FROM KEY TO _Entry, LEAST RECENTLY USED FIRST
+        self.num_bytes = 0
+        self.checked = {}  # MAP FROM TABLE NAME TO (CHECK TIME, UPDATE_TIME)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def cacheable(self, sql):
+        """
+        :return: True IF THE RESULT OF sql ONLY DEPENDS ON THE TABLES IT READS
+        """
+        sql = _comment.sub(" ", _literal.sub("''", sql))
+        return bool(_readable.match(sql)) and not _volatile.search(sql)
+
+    def get(self, key, update_times=None):
+        """
+        :param key: (schema, sql) PAIR
+        :param update_times: FUNCTION THAT RETURNS {table: UPDATE_TIME} FOR THE GIVEN TABLE NAMES
+        :return: (header, rows) OR None
+        """
+        now = time()
+        with self.locker:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if now > entry.expires:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+        if update_times and entry.versions:
+            versions = self._versions(entry.versions, update_times)
+            if versions != entry.versions:
+                DEBUG and Log.note("table changed, drop {{sql|quote}}", sql=key[1])
+                with self.locker:
+                    if self.entries.get(key) is entry:
+                        self._remove(key)
+                        self.invalidations += 1
+                    self.misses += 1
+                return None
+
+        with self.locker:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.hits += 1
+        return entry.header, entry.rows
+
+    def tables(self, sql):
+        """
+        :return: SET OF (LOWER CASE) NAMES sql MAY DEPEND ON
+        """
+        return _words(sql)
+
+    def versions(self, tables, update_times=None):
+        """
+        CALL BEFORE RUNNING THE QUERY, SO A CONCURRENT CHANGE IS NOT MISSED
+        :return: {table: UPDATE_TIME} FOR THE GIVEN TABLES, OR None IF NOT CHECKED
+        """
+        if not update_times or self.check_after is False:
+            return None
+        return self._versions(tables, update_times)
+
+    def add(self, key, header, rows, tables, versions=None):
+        """
+        REMEMBER THE RESULT OF A QUERY
+        :param key: (schema, sql) PAIR
+        :param header: TUPLE OF COLUMN NAMES
+        :param rows: LIST OF ROW TUPLES
+        :param tables: NAMES THE QUERY DEPENDS ON (SEE tables())
+        :param versions: RESULT OF versions(), TAKEN BEFORE THE QUERY RAN
+        """
+        size = _size_of(key[1], rows)
+        if size > self.max_bytes:
+            return
+        entry = _Entry(header, tuple(rows), frozenset(tables), versions, size, time() + self.ttl)
+        with self.locker:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self.num_bytes += size
+            while len(self.entries) > self.max_entries or self.num_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, sql):
+        """
+        DROP RESULTS THAT MAY HAVE BEEN CHANGED BY sql
+        :return: True IF sql WRITES
+        """
+        sql = _comment.sub(" ", _literal.sub("''", sql))
+        commands = set(m.group(1).upper() for m in _write.finditer(sql))
+        if not commands:
+            return False
+
+        targets = set()
+        for m in _target.finditer(sql):
+            # schema.table IS KNOWN BY table
+            targets.add(_last_word(m.group(1)))
+        if not targets or "CALL" in commands or re.search(r"\bJOIN\b|,", _before_set(sql), re.IGNORECASE):
+            # CAN NOT TELL WHAT CHANGED
+            self.clear()
+            return True
+
+        metadata = bool(commands & _ddl)
+        with self.locker:
+            for key, entry in list(self.entries.items()):
+                if targets & entry.tables or (metadata and _is_metadata(entry.tables)):
+                    self._remove(key)
+                    self.invalidations += 1
+            for t in targets:
+                self.checked.pop(t, None)
+        return True
+
+    def clear(self):
+        with self.locker:
+            self.invalidations += len(self.entries)
+            self.entries = OrderedDict()
+            self.num_bytes = 0
+            self.checked = {}
+
+    def stats(self):
+        with self.locker:
+            return Data(
+                name=self.name,
+                entries=len(self.entries),
+                bytes=self.num_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                invalidations=self.invalidations,
+            )
+
+    def _versions(self, tables, update_times):
+        now = time()
+        with self.locker:
+            stale = [t for t in tables if now - self.checked.get(t, (0, None))[0] > self.check_after]
+        if stale:
+            found = update_times(stale)
+            with self.locker:
+                for t in stale:
+                    self.checked[t] = (now, found.get(t))
+        with self.locker:
+            return {t: self.checked.get(t, (0, None))[1] for t in tables}
+
+    def _remove(self, key):
+        # MUST BE CALLED WITH LOCK
+        entry = self.entries.pop(key)
+        self.num_bytes -= entry.size
+
+
+class _Entry(object):
+    __slots__ = ["header", "rows", "tables", "versions", "size", "expires"]
+
+    def __init__(self, header, rows, tables, versions, size, expires):
+        self.header = header
+        self.rows = rows
+        self.tables = tables
+        self.versions = versions
+        self.size = size
+        self.expires = expires
+
+
+def _words(sql):
+    """
+    EVERY IDENTIFIER IN sql, WHICH INCLUDES ALL THE TABLES IT USES
+    """
+    sql = _comment.sub(" ", _literal.sub("''", sql))
+    output = set()
+    for quoted, plain in _word.findall(sql):
+        output.add((quoted.replace("``", "`") if quoted else plain).lower())
+    return output
+
+
+def _last_word(name):
+    quoted, plain = _word.findall(name)[-1]
+    return (quoted.replace("``", "`") if quoted else plain).lower()
+
+
+def _before_set(sql):
+    """
+    THE TABLE LIST OF AN UPDATE OR DELETE (JOINED TABLES MAY ALSO BE WRITTEN)
+    """
+    m = re.search(r"^\s*(?:UPDATE|DELETE)\b(.*?)(?:\bSET\b|\bWHERE\b|$)", sql, re.IGNORECASE | re.DOTALL)
+    if m:
+        return m.group(1)
+    return ""
+
+
+def _is_metadata(tables):
+    return "information_schema" in tables or "show" in tables or "desc" in tables or "describe" in tables
+
+
+def _size_of(sql, rows):
+    """
+    ROUGH NUMBER OF BYTES USED BY rows
+    """
+    size = len(sql) + 64
+    for row in rows:
+        size += 56 + 8 * len(row)
+        for v in row:
+            if isinstance(v, (str, bytes, bytearray)):
+                size += len(v)
+            else:
+                size += 24
+    return size
+
+
+def new_cache(settings):
+    """
+    :param settings: CACHE PARAMETERS (SEE QueryCache), OR True FOR DEFAULTS
+    """
+    settings = to_settings(settings)
+    return QueryCache(
+        max_entries=coalesce(settings.max_entries, 1000),
+        max_bytes=coalesce(settings.max_bytes, 10 * 1024 * 1024),
+        ttl=coalesce(settings.ttl, 60),
+        check_after=coalesce(settings.check_after, 1),
+    )
@@ -0,0 +1,25 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+
+class SqlBuffer(bytearray):
+    """
+    utf8 ENCODED SQL, WRITTEN ONE PIECE AT A TIME, SO A BIG STATEMENT IS NEVER
+    ONE BIG str, NOR ENCODED IN ONE PIECE; pymysql TAKES memoryview(buffer) AS IT
+    IS, BUT STILL COPIES EACH PACKET (prelude + sql[...]) AS IT IS SENT
+    """
+
+    def write(self, text):
+        self += text.encode("utf8")
+
+    def write_sql(self, sql):
+        """
+        WALK THE SQL TREE, WRITING EACH FRAGMENT
+        """
+        for piece in sql:
+            self += piece.encode("utf8")
@@ -0,0 +1,199 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from time import time
+
+from mo_dots import Data, coalesce, is_data, to_data
+from mo_logs import Except, Log
+from mo_threads import Lock
+
+from jx_mysql.settings import to_settings
+
+DEBUG = False
+LATENCY_WEIGHT = 0.3  # WEIGHT OF THE NEWEST MEASURE IN THE LATENCY AVERAGE
+
+routers = {}  # MAP FROM PRIMARY KEY TO ReplicaRouter
+routers_locker = Lock("mysql replica routers")
+
+
+class ReplicaRouter(object):
+    """
+    CHOOSE THE REPLICA FOR THE NEXT READ-ONLY CONNECTION
+
+    A REPLICA IS SKIPPED WHILE IT IS MORE THAN max_lag SECONDS BEHIND THE
+    PRIMARY (Seconds_Behind_Source), WHILE ITS REPLICATION IS STOPPED, OR
+    FOR check_after SECONDS AFTER IT FAILED TO CONNECT
+    """
+
+    def __init__(self, replicas, max_lag=30, check_after=10, balance="connections", name="mysql replicas"):
+        """
+        :param replicas: LIST OF SETTINGS (host, port, ...) FOR EACH REPLICA
+        :param max_lag: SECONDS BEHIND THE PRIMARY BEFORE A REPLICA IS NOT USED
+        :param check_after: SECONDS BEFORE THE LAG OF A REPLICA IS CHECKED AGAIN
+        :param balance: "connections" FOR FEWEST CONNECTIONS, "latency" FOR FEWEST
+                        CONNECTIONS WEIGHTED BY RESPONSE TIME
+        """
+        if balance not in ("connections", "latency"):
+            Log.error("Expecting balance to be \"connections\" or \"latency\", not {{balance|quote}}", balance=balance)
+        self.replicas = [_Replica(r) for r in replicas]
+        self.max_lag = max_lag
+        self.check_after = check_after
+        self.balance = balance
+        self.name = name
+        self.locker = Lock(name)
+        self.num_primary = 0  # TIMES NO REPLICA COULD BE USED
+
+    def choose(self, exclude=()):
+        """
+        :param exclude: REPLICAS ALREADY TRIED
+        :return: THE _Replica TO USE (WHICH MUST BE GIVEN BACK WITH release()), OR None FOR THE PRIMARY
+        """
+        now = time()
+        with self.locker:
+            candidates = [
+                r
+                for r in self.replicas
+                if r not in exclude
+                and now >= r.down_until
+                # A LAGGING REPLICA IS TRIED AGAIN WHEN IT IS DUE FOR A CHECK
+                and (now - r.checked > self.check_after or (r.lag is not None and r.lag <= self.max_lag))
+            ]
+            if not candidates:
+                self.num_primary += 1
+                return None
+            if self.balance == "latency":
+                best = min(candidates, key=lambda r: ((r.active + 1) * coalesce(r.latency, 0), r.active))
+            else:
+                best = min(candidates, key=lambda r: (r.active, coalesce(r.latency, 0)))
+            best.active += 1
+            return best
+
+    def release(self, replica):
+        with self.locker:
+            replica.active -= 1
+
+    def failed(self, replica, cause):
+        """
+        replica COULD NOT BE REACHED; DO NOT TRY IT FOR A WHILE
+        """
+        Log.warning("Can not use replica {{host}}", host=replica.settings.host, cause=cause)
+        with self.locker:
+            replica.active -= 1
+            replica.down_until = time() + self.check_after
+
+    def due(self, replica):
+        """
+        :return: True IF THE LAG OF replica SHOULD BE CHECKED
+        """
+        return time() - replica.checked > self.check_after
+
+    def check(self, replica, connection):
+        """
+        UPDATE THE LAG AND LATENCY OF replica, USING connection (TO replica) IF DUE
+        :return: True IF replica IS CLOSE ENOUGH TO THE PRIMARY TO USE
+        """
+        if self.due(replica):
+            start = time()
+            try:
+                lag = _lag(connection)
+            except Exception as e:
+                e = Except.wrap(e)
+                if not connection.open:
+                    raise e
+                # PROBABLY NO REPLICATION CLIENT PRIVILEGE; CAN NOT TELL, SO ASSUME CURRENT
+                Log.warning("Can not check lag of replica {{host}}", host=replica.settings.host, cause=e)
+                lag = 0
+            latency = time() - start
+            with self.locker:
+                replica.checked = time()
+                replica.lag = lag
+                if replica.latency is None:
+                    replica.latency = latency
+                else:
+                    replica.latency += LATENCY_WEIGHT * (latency - replica.latency)
+            DEBUG and Log.note(
+                "replica {{host}} is {{lag}} seconds behind", host=replica.settings.host, lag=lag
+            )
+        lag = replica.lag
+        return lag is not None and lag <= self.max_lag
+
+    def stats(self):
+        with self.locker:
+            return Data(
+                name=self.name,
+                primary=self.num_primary,
+                replicas=[
+                    {
+                        "host": r.settings.host,
+                        "active": r.active,
+                        "lag": r.lag,
+                        "latency": r.latency,
+                        "down": r.down_until > time(),
+                    }
+                    for r in self.replicas
+                ],
+            )
+
+
+class _Replica(object):
+    __slots__ = ["settings", "active", "latency", "lag", "checked", "down_until"]
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.active = 0  # CONNECTIONS IN USE
+        self.latency = None  # AVERAGE SECONDS TO ANSWER THE LAG CHECK
+        self.lag = None  # SECONDS BEHIND THE PRIMARY; None IF UNKNOWN, OR REPLICATION IS STOPPED
+        self.checked = 0  # WHEN THE lag WAS LAST CHECKED
+        self.down_until = 0  # DO NOT USE BEFORE THIS TIME
+
+
+def _lag(connection):
+    """
+    :return: SECONDS connection IS BEHIND ITS SOURCE (0 IF NOT A REPLICA), OR None IF REPLICATION IS STOPPED
+    """
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Exception:
+            # BEFORE MySQL 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+        if row is None:
+            return 0
+        status = dict(zip([d[0] for d in cursor.description], row))
+        for _ in cursor:
+            pass  # MULTI-SOURCE REPLICATION HAS MORE ROWS; ONLY THE FIRST IS USED
+    return coalesce(status.get("Seconds_Behind_Source"), status.get("Seconds_Behind_Master"))
+
+
+def get_router(key, settings):
+    """
+    :param key: HASHABLE IDENTITY OF THE PRIMARY DATABASE AND USER
+    :param settings: LIST OF REPLICA HOSTS (OR SETTINGS), OR {hosts, max_lag, check_after, balance}
+    :return: THE ReplicaRouter SHARED BY ALL WITH THE SAME key
+    """
+    with routers_locker:
+        router = routers.get(key)
+        if router is None:
+            settings = to_settings(settings)
+            if not is_data(settings):
+                settings = Data(hosts=settings)
+            replicas = []
+            for host in settings.hosts:
+                if is_data(host):
+                    replicas.append(to_data(host))
+                else:
+                    replicas.append(Data(host=host))
+            router = routers[key] = ReplicaRouter(
+                replicas,
+                max_lag=coalesce(settings.max_lag, 30),
+                check_after=coalesce(settings.check_after, 10),
+                balance=coalesce(settings.balance, "connections"),
+                name="mysql replicas of " + str(key[0]),
+            )
+        return router
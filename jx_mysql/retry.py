@@ -0,0 +1,101 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+import re
+from collections import deque
+from random import uniform
+from time import time
+
+from mo_dots import coalesce
+from mo_logs import Except
+from mo_threads import Lock
+
+from jx_mysql.settings import to_settings
+
+DEBUG = False
+
+# CLIENT ERRORS THAT MEAN THE CONNECTION IS GONE
+DISCONNECT_CODES = (2006, 2013, 2055)
+DISCONNECT_MESSAGES = (
+    "MySQL server has gone away",
+    "Lost connection to MySQL server",
+    "Connection reset by peer",
+    "Broken pipe",
+)
+
+_read = re.compile(r"^\s*(?:(?:#[^\n]*(?:\n|$)|--\s[^\n]*(?:\n|$)|/\*.*?\*/)\s*)*(?:(?:SELECT|SHOW|DESC|DESCRIBE|EXPLAIN|WITH)\b|\()", re.IGNORECASE | re.DOTALL)
+
+
+class RetryPolicy(object):
+    """
+    HOW OFTEN, AND HOW LONG AFTER, A LOST CONNECTION IS TRIED AGAIN
+    """
+
+    def __init__(self, tries=5, base=0.5, max_delay=30, budget=10, window=60):
+        """
+        :param tries: MAXIMUM ATTEMPTS OF ONE REQUEST (INCLUDING THE FIRST)
+        :param base: SECONDS BEFORE THE FIRST RETRY; DOUBLES WITH EACH RETRY
+        :param max_delay: MAXIMUM SECONDS BETWEEN ATTEMPTS
+        :param budget: MAXIMUM RETRIES, OVER ALL REQUESTS, IN ANY window SECONDS
+        :param window: SECONDS OVER WHICH budget IS COUNTED
+        """
+        self.tries = tries
+        self.base = base
+        self.max_delay = max_delay
+        self.budget = budget
+        self.window = window
+        self.locker = Lock("retry budget")
+        self.recent = deque()  # TIMES OF RECENT RETRIES
+
+    def delay(self, attempt):
+        """
+        :param attempt: NUMBER OF ATTEMPTS ALREADY MADE
+        :return: SECONDS TO WAIT BEFORE THE NEXT ATTEMPT, OR None IF NO MORE ATTEMPTS ARE ALLOWED
+        """
+        if attempt >= self.tries:
+            return None
+        now = time()
+        with self.locker:
+            while self.recent and self.recent[0] < now - self.window:
+                self.recent.popleft()
+            if len(self.recent) >= self.budget:
+                return None
+            self.recent.append(now)
+        # FULL JITTER, SO MANY CLIENTS DO NOT RECONNECT AT THE SAME MOMENT
+        return uniform(0, min(self.max_delay, self.base * 2 ** (attempt - 1)))
+
+
+def new_retry(settings):
+    """
+    :param settings: RetryPolicy PARAMETERS, OR True FOR DEFAULTS
+    """
+    settings = to_settings(settings)
+    return RetryPolicy(
+        tries=coalesce(settings.tries, 5),
+        base=coalesce(settings.base, 0.5),
+        max_delay=coalesce(settings.max_delay, 30),
+        budget=coalesce(settings.budget, 10),
+        window=coalesce(settings.window, 60),
+    )
+
+
+def is_disconnect(e):
+    """
+    :return: True IF e IS (CAUSED BY) A LOST CONNECTION
+    """
+    e = Except.wrap(e)
+    return any(m in e for m in DISCONNECT_MESSAGES) or any(
+        "(" + str(c) + "," in e for c in DISCONNECT_CODES
+    )
+
+
+def is_read(sql):
+    """
+    :return: True IF sql ONLY READS, SO IT CAN BE SENT AGAIN
+    """
+    return bool(_read.match(str(sql)))
@@ -0,0 +1,185 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from functools import partial
+
+from mo_dots import Data, Null, from_data, leaves_to_data, split_field
+from mo_dots.datas import SLOT, register_data
+
+MAX_LAYOUTS = 1000  # RESULT DESCRIPTIONS REMEMBERED
+
+_layouts = {}  # MAP FROM COLUMN NAMES TO _Layout
+_get = object.__getattribute__
+_set = object.__setattr__
+_not_columns = {"_layout", "_values", SLOT}
+
+
+class Row(object):
+    """
+    ONE RESULT ROW: THE CURSOR TUPLE, WITH Data ACCESS BY COLUMN NAME
+
+    COLUMN NAMES WITH DOTS ARE PATHS (row.a.b FOR COLUMN "a.b"); THE NESTED
+    OBJECT IS BUILT WHEN IT IS ASKED FOR. CHANGING A Row TURNS IT INTO A Data
+
+    mo_dots ONLY UNWRAPS ITS OWN CLASSES, SO A Row CLAIMS TO BE A Data, AND
+    HANDS OVER ITS dict (AS A Data WOULD) WHEN from_data() ASKS FOR IT
+    """
+
+    __slots__ = ["_layout", "_values"]
+
+    def __init__(self, layout, values):
+        _set(self, "_layout", layout)
+        _set(self, "_values", values)
+
+    @property
+    def __class__(self):
+        return Data
+
+    def __getattr__(self, key):
+        if key in _not_columns or key.startswith("__"):
+            # copy, pickle, AND OTHERS LOOK FOR THESE; ALSO CALLED BEFORE THE SLOTS ARE SET
+            raise AttributeError(key)
+        layout = self._layout
+        if layout is None:
+            return getattr(self._values, key)
+        i = layout.index.get(key)
+        if i is not None:
+            v = self._values[i]
+            return Null if v is None else v
+        if key in layout.nested:
+            # NESTED OBJECTS ARE BUILT ON FIRST ACCESS, AND KEPT
+            return self._changed()[key]
+        return Null
+
+    def __getitem__(self, key):
+        layout = self._layout
+        if layout is None:
+            return self._values[key]
+        if key not in layout.index and "." in key:
+            return self._data()[key]
+        return Row.__getattr__(self, key)
+
+    def __setattr__(self, key, value):
+        self._changed()[key] = value
+
+    __setitem__ = __setattr__
+
+    def get(self, key, default=None):
+        v = self[key]
+        return default if v == None else v
+
+    def keys(self):
+        return [k for k, _ in self.items()]
+
+    def values(self):
+        return [v for _, v in self.items()]
+
+    def items(self):
+        if self._layout is None:
+            return list(self._values.items())
+        output = []
+        for k in self._layout.keys:
+            v = Row.__getattr__(self, k)
+            if v != None:
+                output.append((k, v))
+        return output
+
+    def __iter__(self):
+        # SAME AS Data
+        return iter(self.items())
+
+    def __len__(self):
+        return len(self.items())
+
+    def __contains__(self, key):
+        return self[key] != None
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return self._data() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __data__(self):
+        return self._data()
+
+    def __reduce__(self):
+        if self._layout is None:
+            return Row, (None, self._values)
+        return _make_row, (self._layout.columns, self._values)
+
+    def __repr__(self):
+        return "Row(" + repr(from_data(self._data())) + ")"
+
+    def _data(self):
+        """
+        :return: THE ROW AS Data
+        """
+        if self._layout is None:
+            return self._values
+        return leaves_to_data(dict(zip(self._layout.columns, self._values)))
+
+    def _changed(self):
+        if self._layout is not None:
+            _set(self, "_values", self._data())
+            _set(self, "_layout", None)
+        return self._values
+
+
+def _internal_value(self):
+    """
+    THE dict A Data WOULD HOLD; from_data() READS IT
+    """
+    return _get(self._changed(), SLOT)
+
+
+setattr(Row, SLOT, property(_internal_value))
+register_data(Row)
+
+
+class _Layout(object):
+    """
+    WHAT IS COMMON TO ALL ROWS OF ONE RESULT
+    """
+
+    __slots__ = ["columns", "index", "nested", "keys"]
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.index = {}  # MAP FROM COLUMN NAME TO POSITION
+        self.nested = set()  # FIRST STEP OF EACH DOTTED NAME
+        self.keys = []  # TOP-LEVEL NAMES, IN ORDER
+        for i, c in enumerate(columns):
+            self.index[c] = i
+            steps = split_field(c)
+            if len(steps) > 1:
+                self.nested.add(steps[0])
+            if steps and steps[0] not in self.keys:
+                self.keys.append(steps[0])
+
+
+def row_maker(columns):
+    """
+    :param columns: TUPLE OF COLUMN NAMES
+    :return: FUNCTION THAT TURNS A ROW TUPLE INTO A Row
+    """
+    layout = _layouts.get(columns)
+    if layout is None:
+        if len(_layouts) >= MAX_LAYOUTS:
+            _layouts.clear()
+        layout = _layouts[columns] = _Layout(columns)
+    return partial(Row, layout)
+
+
+def _make_row(columns, values):
+    return row_maker(columns)(values)
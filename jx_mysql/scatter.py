@@ -0,0 +1,320 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+import queue
+import re
+from itertools import islice
+
+from mo_logs import Except, Log, suppress_exception
+from mo_sql import (
+    ConcatSQL,
+    SQL_AND,
+    SQL_GE,
+    SQL_IS_NULL,
+    SQL_LT,
+    SQL_OR,
+    SQL_TRUE,
+    sql_iso,
+)
+from mo_threads import Thread
+
+from jx_mysql.rows import row_maker
+
+DEBUG = False
+BATCH_SIZE = 1000  # ROWS HANDED FROM A SHARD THREAD TO THE CONSUMER AT A TIME
+BUFFER = 10  # BATCHES A SHARD MAY READ AHEAD OF THE CONSUMER
+PUT_WAIT = 1  # SECONDS BETWEEN CHECKS OF please_stop WHILE THE CONSUMER IS BEHIND
+
+_HEADER, _ROWS, _DONE, _ERROR = "header", "rows", "done", "error"
+_shard = re.compile(r"{{\s*shard\s*}}")
+
+
+def scatter(
+    db,
+    sql,
+    key,
+    table=None,
+    shards=4,
+    ranges=None,
+    param=None,
+    ordered=False,
+    snapshot=False,
+    format=None,
+):
+    """
+    RUN ONE QUERY AS shards RANGE QUERIES, EACH ON ITS OWN CONNECTION, AND
+    MERGE THE RESULTS INTO ONE STREAM
+
+    :param db: MySql TO COPY THE CONNECTION SETTINGS FROM
+    :param sql: SQL TEMPLATE WITH A {{shard}} PARAMETER, WHICH IS REPLACED WITH
+                THE RANGE CONDITION ON key (eg "SELECT * FROM t WHERE {{shard}}")
+    :param key: COLUMN THE RANGES ARE ON; SHOULD BE INDEXED
+    :param table: TABLE TO PLAN THE RANGES FROM, WITH MIN(key) AND MAX(key)
+    :param shards: NUMBER OF CONNECTIONS
+    :param ranges: SORTED BOUNDARIES BETWEEN SHARDS, INSTEAD OF PLANNING FROM table
+    :param param: MORE PARAMETERS FOR THE TEMPLATE
+    :param ordered: True TO RETURN THE SHARDS IN key ORDER (EACH SHARD IN THE
+                    ORDER THE SQL GIVES); LATER SHARDS ONLY READ AHEAD BUFFER BATCHES
+    :param snapshot: True SO ALL SHARDS SEE THE SAME DATA; WRITES ARE BLOCKED
+                     (FLUSH TABLES WITH READ LOCK, OR LOCK TABLES table READ)
+                     WHILE THE SHARDS START THEIR TRANSACTIONS; ALL SHARDS READ
+                     THE PRIMARY, NOT THE REPLICAS
+    :param format: "list" FOR dicts, "table" FOR {"header", "data"} OF TUPLES, OR None FOR Data
+    :return: ITERATOR OVER ROWS; close() IT TO STOP EARLY
+    """
+    if not _shard.search(str(sql)):
+        Log.error("Expecting {{shard}} in the query template to hold the range condition")
+    if ranges is None:
+        if not table:
+            Log.error("Expecting table (to plan the ranges from) or ranges")
+        ranges = plan_ranges(db, table, key, shards)
+    conditions = range_conditions(key, ranges)
+
+    gather = Gather(db, sql, param, conditions, ordered, snapshot, table)
+    if format == "table":
+        return {"header": gather.header, "data": gather}
+    elif format == "list":
+        gather.convert = lambda row: dict(zip(gather.header, row))
+    else:
+        gather.convert = row_maker(gather.header)
+    return gather
+
+
+def plan_ranges(db, table, key, shards):
+    """
+    :return: UP TO shards-1 SORTED BOUNDARIES THAT SPLIT [MIN(key), MAX(key)] EVENLY
+    """
+    from jx_mysql.mysql import quote_column
+
+    column = str(quote_column(*key.split(".")))
+    found = db.query(
+        "SELECT MIN(" + column + ") AS lo, MAX(" + column + ") AS hi"
+        + " FROM " + str(quote_column(*table.split("."))),
+        format="list",
+        cache=False,
+    )[0]
+    lo, hi = found["lo"], found["hi"]
+    if lo is None or lo == hi:
+        return []
+    try:
+        if isinstance(lo, int):
+            bounds = [lo + (hi - lo + 1) * i // shards for i in range(1, shards)]
+        else:
+            bounds = [lo + (hi - lo) * i / shards for i in range(1, shards)]
+    except Exception as e:
+        Log.error("Can not split range of {{key}}, give ranges instead", key=key, cause=e)
+    return sorted(set(b for b in bounds if lo < b <= hi))
+
+
+def range_conditions(key, ranges):
+    """
+    :param ranges: SORTED BOUNDARIES BETWEEN SHARDS
+    :return: ONE SQL CONDITION PER SHARD; TOGETHER THEY COVER ALL ROWS, INCLUDING
+             NULL key AND VALUES OUTSIDE THE PLANNED RANGE
+    """
+    from jx_mysql.mysql import quote_column, quote_value
+
+    if not ranges:
+        return [SQL_TRUE]
+    column = quote_column(*key.split("."))
+    values = [quote_value(v) for v in ranges]
+    output = [sql_iso(ConcatSQL(column, SQL_LT, values[0], SQL_OR, column, SQL_IS_NULL))]
+    for lo, hi in zip(values, values[1:]):
+        output.append(sql_iso(ConcatSQL(column, SQL_GE, lo, SQL_AND, column, SQL_LT, hi)))
+    output.append(sql_iso(ConcatSQL(column, SQL_GE, values[-1])))
+    return output
+
+
+class Gather(object):
+    """
+    ITERATOR OVER THE ROWS OF ALL SHARDS, EACH READ BY ITS OWN THREAD AND CONNECTION
+    """
+
+    def __init__(self, db, sql, param, conditions, ordered, snapshot, table):
+        self.convert = None
+        self.ordered = ordered
+        self.header = None
+        self.workers = []
+        self.threads = []
+        self.current = iter([])
+        self.shard = 0  # SHARD BEING READ, WHEN ordered
+        self.remaining = len(conditions)  # SHARDS NOT DONE
+        if ordered:
+            self.queues = [queue.Queue(BUFFER) for _ in conditions]
+        else:
+            shared = queue.Queue(BUFFER * len(conditions))
+            self.queues = [shared] * len(conditions)
+
+        try:
+            for _ in conditions:
+                worker = _new_worker(db, snapshot)
+                self.workers.append(worker)
+                worker.begin()
+            if snapshot:
+                _start_snapshot(db, self.workers, table)
+
+            for i, (worker, condition) in enumerate(zip(self.workers, conditions)):
+                shard_sql = _shard.sub(lambda _: str(condition), str(sql))
+                self.threads.append(
+                    Thread.run(
+                        "scatter shard " + str(i),
+                        _read_shard,
+                        worker,
+                        shard_sql,
+                        param,
+                        i,
+                        self.queues[i],
+                    )
+                )
+
+            # EVERY SHARD SENDS THE SAME HEADER FIRST
+            self.header = self._next_batch()
+        except Exception as e:
+            self.close()
+            Log.error("Can not start scatter query", cause=e)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            for row in self.current:
+                if self.convert:
+                    return self.convert(row)
+                return row
+            batch = self._next_batch()
+            if batch is None:
+                self.close()
+                raise StopIteration
+            self.current = iter(batch)
+
+    def _next_batch(self):
+        """
+        :return: header (THE FIRST TIME), THEN BATCHES OF ROWS, THEN None WHEN ALL SHARDS ARE DONE
+        """
+        while self.remaining:
+            i, kind, value = self.queues[self.shard].get()
+            if kind == _ERROR:
+                self.close()
+                Log.error("Shard {{shard}} failed", shard=i, cause=value)
+            elif kind == _DONE:
+                self.remaining -= 1
+                if self.ordered:
+                    self.shard += 1
+            elif kind == _HEADER:
+                if self.header is None:
+                    return value
+            else:
+                return value
+        return None
+
+    def close(self):
+        threads, self.threads = self.threads, []
+        for t in threads:
+            t.stop()
+        for t in threads:
+            with suppress_exception:
+                t.join()
+        workers, self.workers = self.workers, []
+        for w in workers:
+            with suppress_exception:
+                # NOTHING WAS WRITTEN, SO NOTHING TO KEEP
+                w.rollback()
+            with suppress_exception:
+                w.close()
+        self.remaining = 0
+        self.current = iter([])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        with suppress_exception:
+            self.close()
+
+
+def _new_worker(db, snapshot):
+    """
+    SAME DATABASE, BUT NO CACHE OR LOGS OF ITS OWN
+    """
+    from jx_mysql.mysql import MySql
+
+    return MySql(
+        instrument=db.instruments,
+        cache=None,
+        sql_log=None,
+        slow_log=None,
+        # THE SNAPSHOT LOCK IS TAKEN ON THE PRIMARY, SO ONLY SHARDS ON THE PRIMARY SEE THE SAME DATA
+        replicas=None if snapshot else db.settings.replicas,
+        kwargs=db.settings,
+    )
+
+
+def _start_snapshot(db, workers, table):
+    """
+    BLOCK WRITES WHILE EVERY WORKER STARTS A CONSISTENT SNAPSHOT
+    """
+    from jx_mysql.mysql import _connect, quote_column
+
+    lock = _connect(db.settings)
+    try:
+        with lock.cursor() as cursor:
+            try:
+                cursor.execute("FLUSH TABLES WITH READ LOCK")
+            except Exception as e:
+                # NEEDS THE RELOAD PRIVILEGE; LOCKING THE ONE TABLE IS THE NEXT BEST
+                if not table:
+                    Log.error("Can not lock database for snapshot; give table to lock instead", cause=e)
+                DEBUG and Log.note("lock {{table}} for snapshot", table=table)
+                cursor.execute("LOCK TABLES " + str(quote_column(*table.split("."))) + " READ")
+            try:
+                for w in workers:
+                    with w.db.cursor() as worker_cursor:
+                        worker_cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+            finally:
+                cursor.execute("UNLOCK TABLES")
+    finally:
+        with suppress_exception:
+            lock.close()
+
+
+def _read_shard(worker, sql, param, i, output, please_stop):
+    def put(kind, value=None):
+        while not please_stop:
+            try:
+                output.put((i, kind, value), timeout=PUT_WAIT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    try:
+        result = worker.query(sql, param, stream=True, format="table")
+        rows = result["data"]
+        try:
+            if not put(_HEADER, result["header"]):
+                return
+            while True:
+                batch = list(islice(rows, BATCH_SIZE))
+                if not batch:
+                    break
+                if not put(_ROWS, batch):
+                    return
+        finally:
+            if please_stop:
+                # CHEAPER TO DROP THE CONNECTION THAN TO READ THE REST OF THE RESULT
+                with suppress_exception:
+                    worker.db.close()
+            with suppress_exception:
+                rows.close()
+        put(_DONE)
+    except Exception as e:
+        put(_ERROR, Except.wrap(e))
@@ -0,0 +1,153 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+import gzip
+import io
+import re
+from zipfile import ZipFile
+
+from mo_files import File
+from mo_logs import Log
+
+_delimiter_command = re.compile(r"\s*DELIMITER\s+(\S+)", re.IGNORECASE)
+_quote_end = {
+    # A QUOTE IS CLOSED BY A QUOTE THAT IS NOT DOUBLED
+    "'": re.compile(r"[^'\\]*(?:(?:\\.|'')[^'\\]*)*'(?!')", re.DOTALL),
+    '"': re.compile(r'[^"\\]*(?:(?:\\.|"")[^"\\]*)*"(?!")', re.DOTALL),
+    "`": re.compile(r"[^`]*(?:``[^`]*)*`(?!`)", re.DOTALL),
+}
+_COMMENT = "/*"  # STATE: IN A COMMENT, WHICH IS DROPPED
+_HINT = "/*!"  # STATE: IN AN EXECUTABLE COMMENT, WHICH IS KEPT
+
+
+def split_sql(lines):
+    """
+    SPLIT A SQL SCRIPT INTO STATEMENTS, LIKE THE mysql CLIENT DOES
+    HANDLES DELIMITER COMMANDS, QUOTES, AND COMMENTS (/*! */ AND /*+ */ ARE KEPT)
+
+    :param lines: ITERABLE OF LINES (WITH LINE ENDINGS), READ ONLY AS NEEDED
+    :return: GENERATOR OF STATEMENTS, WITHOUT THE DELIMITER
+    """
+    delimiter = ";"
+    safe = _safe(delimiter)
+    state = None
+    statement = []  # PARTS OF THE CURRENT STATEMENT
+    for line in lines:
+        if state is None:
+            found = _delimiter_command.match(line)
+            if found and not "".join(statement).strip():
+                delimiter = found.group(1)
+                safe = _safe(delimiter)
+                statement = []
+                continue
+
+        pos, end = 0, len(line)
+        while pos < end:
+            if state is None:
+                # PLAIN TEXT, AND WHOLE QUOTES, UP TO THE NEXT INTERESTING TOKEN
+                stop = safe.match(line, pos).end()
+                if stop > pos:
+                    statement.append(line[pos:stop])
+                    pos = stop
+                    if pos == end:
+                        break
+                if line.startswith(delimiter, pos):
+                    pos += len(delimiter)
+                    sql = "".join(statement).strip()
+                    statement = []
+                    if sql:
+                        yield sql
+                    continue
+                token = line[pos]
+                if token in _quote_end:
+                    # QUOTE CONTINUES ON NEXT LINE
+                    state = token
+                    statement.append(line[pos:])
+                    break
+                elif token == "#" or (
+                    line.startswith("--", pos) and line[pos + 2 : pos + 3] in ("", " ", "\t", "\r", "\n")
+                ):
+                    # LINE COMMENT
+                    statement.append("\n")
+                    break
+                elif line.startswith("/*", pos):
+                    if line[pos + 2 : pos + 3] in ("!", "+"):
+                        state = _HINT
+                        statement.append("/*")
+                    else:
+                        state = _COMMENT
+                        statement.append(" ")
+                    pos += 2
+                else:
+                    statement.append(token)
+                    pos += 1
+            elif state is _COMMENT or state is _HINT:
+                close = line.find("*/", pos)
+                if close == -1:
+                    if state is _HINT:
+                        statement.append(line[pos:])
+                    break
+                if state is _HINT:
+                    statement.append(line[pos : close + 2])
+                pos = close + 2
+                state = None
+            else:
+                found = _quote_end[state].match(line, pos)
+                if not found:
+                    # QUOTE CONTINUES ON NEXT LINE
+                    statement.append(line[pos:])
+                    break
+                statement.append(found.group())
+                pos = found.end()
+                state = None
+
+    if state in _quote_end:
+        Log.error("Expecting closing {{quote}} at end of script", quote=state)
+    sql = "".join(statement).strip()
+    if sql:
+        yield sql
+
+
+def read_lines(filename, encoding="utf8"):
+    """
+    :return: GENERATOR OF LINES, READ AS NEEDED; zip (FIRST FILE ONLY) AND gz ARE DECOMPRESSED
+    """
+    file = File(filename)
+    if file.extension == "zip":
+        with ZipFile(file.abspath) as zipped:
+            for zip_name in zipped.namelist():
+                with io.TextIOWrapper(zipped.open(zip_name), encoding=encoding) as lines:
+                    for line in lines:
+                        yield line
+                return
+    elif file.extension == "gz":
+        with gzip.open(file.abspath, "rt", encoding=encoding) as lines:
+            for line in lines:
+                yield line
+    else:
+        with open(file.abspath, "r", encoding=encoding) as lines:
+            for line in lines:
+                yield line
+
+
+def _safe(delimiter):
+    """
+    :return: PATTERN FOR TEXT THAT DOES NOT START A QUOTE OR COMMENT, OR END A STATEMENT
+    """
+    first = re.escape(delimiter[0])
+    return re.compile(
+        "(?:(?!" + re.escape(delimiter) + ")(?:"
+        + "[^'\"`#/\\-" + first + "]+"
+        + "|'" + _quote_end["'"].pattern
+        + '|"' + _quote_end['"'].pattern
+        + "|`" + _quote_end["`"].pattern
+        + "|-(?!-)|/(?!\\*)"
+        + ("" if delimiter[0] in "'\"`#-/" else "|" + first)
+        + "))*",
+        re.DOTALL,
+    )
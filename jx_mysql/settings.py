@@ -0,0 +1,19 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from mo_dots import Data, to_data
+
+
+def to_settings(settings):
+    """
+    :param settings: PARAMETERS (dict OR Data), OR True FOR DEFAULTS
+    :return: Data, SO MISSING PARAMETERS ARE Null
+    """
+    if settings is True:
+        return Data()
+    return to_data(settings)
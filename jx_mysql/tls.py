@@ -0,0 +1,145 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+import ssl
+from hashlib import sha256
+from time import time
+
+from mo_dots import coalesce
+from mo_files import File, URL
+from mo_http import http
+from mo_logs import Log
+from mo_threads import Lock
+
+DEBUG = False
+PEM_TTL = 24 * 60 * 60  # SECONDS BEFORE THE PEM IS DOWNLOADED AGAIN
+PEM_DIRECTORY = ".pem"
+
+contexts = {}  # MAP FROM PEM URL TO _Entry
+contexts_locker = Lock("mysql ssl contexts")
+
+
+class ResumingContext(ssl.SSLContext):
+    """
+    SSLContext THAT OFFERS THE LAST TLS SESSION WITH EACH HOST, SO
+    RECONNECTING SKIPS THE FULL HANDSHAKE
+    """
+
+    def wrap_socket(self, sock, server_hostname=None, **kwargs):
+        if kwargs.get("session") is None:
+            session = self.sessions.get(server_hostname)
+            if session is not None:
+                kwargs["session"] = session
+        return ssl.SSLContext.wrap_socket(self, sock, server_hostname=server_hostname, **kwargs)
+
+    def remember(self, host, connection):
+        """
+        KEEP THE TLS SESSION OF A CONNECTED pymysql CONNECTION FOR THE NEXT CONNECT
+        """
+        sock = getattr(connection, "_sock", None)
+        session = getattr(sock, "session", None)
+        if session is None:
+            return
+        with self.locker:
+            if getattr(sock, "session_reused", False):
+                self.resumed += 1
+            self.sessions[host] = session
+
+
+def get_ssl_context(settings):
+    """
+    :param settings: {pem, sha256, ttl}; pem IS THE URL OF THE CA CERTIFICATE,
+                     sha256 IS THE EXPECTED HASH OF ITS CONTENT (OPTIONAL),
+                     ttl IS SECONDS BEFORE IT IS DOWNLOADED AGAIN
+    :return: THE ResumingContext SHARED BY ALL CONNECTIONS TRUSTING THE SAME pem
+    """
+    if not settings.pem:
+        Log.error("Expecting 'pem' property in ssl")
+    ttl = coalesce(settings.ttl, PEM_TTL)
+    now = time()
+    with contexts_locker:
+        entry = contexts.get(settings.pem)
+        if entry and now < entry.expires:
+            return entry.context
+
+        content = _read_pem(settings.pem, ttl, now)
+        if content is None or (settings.sha256 and _hash(content) != settings.sha256):
+            content = _download_pem(settings.pem)
+        digest = _hash(content)
+        if settings.sha256 and digest != settings.sha256:
+            Log.error(
+                "PEM from {{url}} has sha256 {{found}}, not {{expected}}",
+                url=settings.pem,
+                found=digest,
+                expected=settings.sha256,
+            )
+
+        if entry and entry.digest == digest:
+            # SAME CERTIFICATE, SO KEEP THE CONTEXT (AND ITS SESSIONS)
+            entry.expires = now + ttl
+            return entry.context
+
+        DEBUG and Log.note("new ssl context for {{url}}", url=settings.pem)
+        context = _new_context(content, settings)
+        contexts[settings.pem] = _Entry(context, digest, now + ttl)
+        return context
+
+
+def _new_context(content, settings):
+    context = ResumingContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.sessions = {}  # MAP FROM HOST TO LAST ssl.SSLSession
+    context.resumed = 0  # NUMBER OF CONNECTIONS THAT SKIPPED THE FULL HANDSHAKE
+    context.locker = Lock("ssl sessions")
+    context.check_hostname = coalesce(settings.check_hostname, True)
+    context.verify_mode = ssl.CERT_REQUIRED
+    if hasattr(ssl, "VERIFY_X509_STRICT"):
+        # CERTIFICATES MADE BY MySQL ITSELF DO NOT PASS THE STRICT CHECKS
+        context.verify_flags &= ~ssl.VERIFY_X509_STRICT
+    try:
+        context.load_verify_locations(cadata=content.decode("ascii"))
+    except Exception as e:
+        Log.error("Expecting PEM certificate from {{url}}", url=settings.pem, cause=e)
+    return context
+
+
+def _pem_file(url):
+    return File(PEM_DIRECTORY) / URL(url).host
+
+
+def _read_pem(url, ttl, now):
+    """
+    :return: CONTENT OF THE PEM ON DISK, IF IT IS YOUNGER THAN ttl
+    """
+    file = _pem_file(url)
+    try:
+        if file.exists and now - file.timestamp < ttl:
+            return file.read_bytes()
+    except Exception as e:
+        DEBUG and Log.note("can not read {{file}}", file=file.abspath, cause=e)
+    return None
+
+
+def _download_pem(url):
+    content = http.get(url).content
+    if b"-----BEGIN CERTIFICATE-----" not in content:
+        Log.error("Expecting PEM certificate from {{url}}", url=url)
+    _pem_file(url).write_bytes(content)
+    return content
+
+
+def _hash(content):
+    return sha256(content).hexdigest()
+
+
+class _Entry(object):
+    __slots__ = ["context", "digest", "expires"]
+
+    def __init__(self, context, digest, expires):
+        self.context = context
+        self.digest = digest
+        self.expires = expires
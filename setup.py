@@ -7,7 +7,7 @@ setup(
     author_email='kyle@lahnakoski.com',
     classifiers=["Development Status :: 4 - Beta","Topic :: Software Development :: Libraries","Topic :: Software Development :: Libraries :: Python Modules","License :: OSI Approved :: Mozilla Public License 2.0 (MPL 2.0)","Programming Language :: Python :: 3.9"],
     description='jx-mysql - JSON Expressions for MySql',
-    extras_require={"tests":["mo-testing"]},
+    extras_require={"async":["aiomysql"],"numpy":["numpy"],"tests":["mo-testing"]},
     include_package_data=True,
     install_requires=["jx-python==4.259.22317","mo-collections==5.252.22317","mo-dots==9.251.22317","mo-files==5.252.22317","mo-future==6.230.22310","mo-http==4.252.22317","mo-json==6.252.22317","mo-kwargs==7.252.22317","mo-logs==7.252.22317","mo-math==7.252.22317","mo-sql==4.252.22317","mo-times==5.252.22317","pymysql"],
     license='MPL 2.0',
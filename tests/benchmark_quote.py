@@ -0,0 +1,91 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+"""
+COMPARE THE INSERT STATEMENT BUILT BY sql_insert_rows() WITH THE ONE BUILT BY
+QUOTING EACH VALUE WITH A CHARACTER-BY-CHARACTER ESCAPE (THE OLD WAY)
+
+    python -m tests.benchmark_quote
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from time import time
+
+from mo_sql import SQL_VALUES, SQL, sql_iso, sql_list, SQL_INSERT
+
+from jx_mysql.mysql import ESCAPE_DCT, quote_column, quote_value, sql_insert_rows
+
+NUM_ROWS = 20000
+REPEAT = 5
+
+
+def old_quote(value):
+    if isinstance(value, str):
+        return SQL("'" + "".join(ESCAPE_DCT.get(c, c) for c in value) + "'")
+    return quote_value(value)
+
+
+def old_insert_rows(table_name, columns, rows):
+    return (
+        SQL_INSERT
+        + quote_column(table_name)
+        + sql_iso(sql_list([quote_column(c) for c in columns]))
+        + SQL_VALUES
+        + sql_list(sql_iso(sql_list([old_quote(v) for v in row])) for row in rows)
+    )
+
+
+def insert_list_rows():
+    """
+    ROWS AS MySql.insert_list() MAKES THEM: ALL KEYS OF dict RECORDS
+    """
+    records = [
+        {"id": i, "name": "name " + str(i), "note": "it's \"quoted\"\n", "score": i / 7}
+        for i in range(NUM_ROWS)
+    ]
+    columns = sorted(records[0].keys())
+    return columns, [[r[k] for k in columns] for r in records]
+
+
+def facts_rows():
+    """
+    ROWS AS Facts._insert() MAKES THEM: META COLUMNS, THEN TYPED COLUMNS, MOSTLY NULL
+    """
+    columns = ["_id", "__id__", "a.$N", "a.$S", "b.$S", "c.$B"]
+    rows = [
+        ["guid" + str(i), i, i if i % 2 else None, None if i % 2 else "text " + str(i), "x" * 40, i % 3 == 0]
+        for i in range(NUM_ROWS)
+    ]
+    return columns, rows
+
+
+def best(function, *args):
+    output = None
+    for _ in range(REPEAT):
+        start = time()
+        function(*args)
+        duration = time() - start
+        output = duration if output is None else min(output, duration)
+    return output
+
+
+def main():
+    for name, (columns, rows) in [("insert_list", insert_list_rows()), ("Facts._insert", facts_rows())]:
+        old = best(lambda: str(old_insert_rows("test", columns, rows)))
+        new = best(lambda: str(sql_insert_rows("test", columns, rows)))
+        print(
+            "{name}: {rows} rows, old {old:.3f}s, new {new:.3f}s, {gain:.1f}x faster".format(
+                name=name, rows=len(rows), old=old, new=new, gain=old / new
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
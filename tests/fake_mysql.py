@@ -0,0 +1,212 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from pymysql.err import InterfaceError, OperationalError
+
+from jx_mysql import mysql
+
+MAX_ALLOWED_PACKET = 1024 * 1024
+
+
+class FakeServer(object):
+    """
+    STANDS IN FOR pymysql.connect(), SO MySql CAN BE TESTED WITHOUT A DATABASE
+
+    with FakeServer() as server:
+        server.result("FROM person", ["id", "name"], [(1, "a")])
+        db = MySql(host="localhost", schema="test")
+        ...
+        server.sent  # EVERY STATEMENT RECEIVED, IN ORDER
+    """
+
+    def __init__(self, max_allowed_packet=MAX_ALLOWED_PACKET):
+        self.max_allowed_packet = max_allowed_packet
+        self.connections = []
+        self.requests = []  # (CONNECTION NUMBER, TEXT) OF EVERY execute(), commit() AND rollback()
+        self.results = []  # (PATTERN, DESCRIPTION, ROWS, ROWCOUNT)
+        self.failures = []  # (PATTERN, EXCEPTION), EACH RAISED ONCE
+        self.warnings = []  # ROWS OF SHOW WARNINGS
+        self.loaded = []  # CONTENT OF EVERY FILE SENT WITH LOAD DATA LOCAL INFILE
+        self.connect_failures = 0
+        self.old_connect = None
+
+    def __enter__(self):
+        self.old_connect = mysql.connect
+        mysql.connect = self.connect
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        mysql.connect = self.old_connect
+
+    def connect(self, **kwargs):
+        if self.connect_failures:
+            self.connect_failures -= 1
+            raise OperationalError(2003, "Can't connect to MySQL server on 'localhost'")
+        connection = FakeConnection(self, len(self.connections), kwargs)
+        self.connections.append(connection)
+        return connection
+
+    def result(self, pattern, columns, rows, rowcount=None):
+        """
+        ANSWER STATEMENTS CONTAINING pattern WITH rows
+        :param columns: COLUMN NAMES, OR pymysql DESCRIPTION TUPLES
+        """
+        description = [c if isinstance(c, tuple) else (c, mysql.FIELD_TYPE.VAR_STRING) for c in columns]
+        self.results.insert(0, (pattern, description, rows, rowcount))
+
+    def fail(self, pattern, error=None):
+        """
+        RAISE error THE NEXT TIME A STATEMENT CONTAINS pattern; DEFAULT IS A LOST CONNECTION
+        """
+        if error is None:
+            error = OperationalError(2013, "Lost connection to MySQL server during query")
+        self.failures.append((pattern, error))
+
+    @property
+    def sent(self):
+        """
+        :return: STATEMENTS SENT BY MySql, SKIPPING THE ONE _connect() SENDS
+        """
+        return [
+            " ".join(s.split())
+            for _, r in self.requests
+            for s in r.split(";\n")
+            if s.strip() and s != "SELECT @@max_allowed_packet"
+        ]
+
+    def _respond(self, sql):
+        if sql == "SELECT @@max_allowed_packet":
+            return [("@@max_allowed_packet", mysql.FIELD_TYPE.LONGLONG)], [(self.max_allowed_packet,)], 1
+        if sql.strip() == "SELECT @@warning_count":
+            return [("@@warning_count", mysql.FIELD_TYPE.LONGLONG)], [(len(self.warnings),)], 1
+        if sql.strip().startswith("SHOW WARNINGS"):
+            return [("Level",), ("Code",), ("Message",)], self.warnings, len(self.warnings)
+        for pattern, description, rows, rowcount in self.results:
+            if pattern in sql:
+                return description, rows, len(rows) if rowcount is None else rowcount
+        return None, [], 1
+
+    def _check(self, connection, sql):
+        for i, (pattern, error) in enumerate(self.failures):
+            if pattern in sql:
+                del self.failures[i]
+                if isinstance(error, OperationalError) and error.args[0] in (2006, 2013):
+                    connection.open = False
+                raise error
+
+
+class FakeConnection(object):
+    def __init__(self, server, number, kwargs):
+        self.server = server
+        self.number = number
+        self.kwargs = kwargs
+        self.open = True
+
+    def cursor(self, cursor_class=None):
+        if not self.open:
+            raise InterfaceError(0, "")
+        return FakeCursor(self)
+
+    def commit(self):
+        self._request("COMMIT")
+
+    def rollback(self):
+        self._request("ROLLBACK")
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise InterfaceError(0, "")
+
+    def close(self):
+        self.open = False
+
+    def _request(self, sql):
+        if not self.open:
+            raise InterfaceError(0, "")
+        self.server.requests.append((self.number, sql))
+        self.server._check(self, sql)
+
+
+class FakeCursor(object):
+    def __init__(self, connection):
+        self.connection = connection
+        self.results = []  # STATEMENTS NOT YET RUN
+        self.description = None
+        self.rows = []
+        self.rowcount = -1
+        self.rownumber = 0
+
+    def execute(self, sql):
+        if isinstance(sql, (bytes, bytearray, memoryview)):
+            sql = bytes(sql).decode("utf8")
+        connection = self.connection
+        if not connection.open:
+            raise InterfaceError(0, "")
+        server = connection.server
+        server.requests.append((connection.number, sql))
+        if sql.startswith("LOAD DATA LOCAL INFILE"):
+            # THE CLIENT SENDS THE FILE, SO READ IT NOW
+            filename = sql.split("'")[1]
+            with open(filename, encoding="utf8", newline="") as file:
+                server.loaded.append(file.read())
+        self.results = sql.split(";\n")
+        self._next()
+        return self.rowcount
+
+    def nextset(self):
+        if not self.results:
+            return None
+        self._next()
+        return True
+
+    def _next(self):
+        # LIKE THE SERVER, AN ERROR IN A LATER STATEMENT ARRIVES WITH ITS RESULT
+        sql = self.results.pop(0)
+        server = self.connection.server
+        server._check(self.connection, sql)
+        self.description, rows, self.rowcount = server._respond(sql)
+        self.rows = iter(rows)
+        self.rownumber = 0
+
+    def fetchone(self):
+        for row in self.rows:
+            self.rownumber += 1
+            return row
+        return None
+
+    def fetchall(self):
+        rows = list(self.rows)
+        self.rownumber += len(rows)
+        return rows
+
+    def fetchmany(self, size=1):
+        output = []
+        for row in self.rows:
+            output.append(row)
+            if len(output) >= size:
+                break
+        self.rownumber += len(output)
+        return output
+
+    def __iter__(self):
+        for row in self.rows:
+            self.rownumber += 1
+            yield row
+
+    def close(self):
+        self.rows = iter([])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,167 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import asyncio
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.async_mysql import AsyncMySql
+
+ROWS = [(1, "a"), (2, "b")]
+
+
+class TestAsyncMySql(FuzzyTestCase):
+    def setUp(self):
+        self.db = AsyncMySql(host="localhost", schema="test", preamble="from test")
+        self.db.pool = _Pool()
+
+    def test_compose(self):
+        sql = self.db._compose("""
+            SELECT * FROM t WHERE name={{name}}
+        """, {"name": "it's"})
+        self.assertEqual(sql.split("\n")[0], "# from test")
+        self.assertIn("\nSELECT * FROM t WHERE name=", sql)
+        self.assertIn("'it''s'", sql)
+
+    def test_query(self):
+        result = asyncio.run(self.db.query("SELECT id, name FROM t", format="list"))
+        self.assertEqual(result, [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+        self.assertEqual(self.db.pool.connection.done, ["commit"])
+
+    def test_insert_list(self):
+        asyncio.run(self.db.insert_list("t", [{"id": 1, "name": "it's"}, {"id": 2, "name": None}]))
+        sql = " ".join(self.db.pool.connection.executed[-1].split())
+        self.assertEqual(sql, "# from test INSERT INTO t ( id , name ) VALUES (1, 'it''s'), (2, NULL )")
+        self.assertEqual(self.db.pool.connection.done, ["commit"])
+
+    def test_rollback_on_error(self):
+        async def fail():
+            async with self.db.transaction() as t:
+                await t.execute("DELETE FROM t")
+                raise Exception("expected failure")
+
+        with self.assertRaises(Exception):
+            asyncio.run(fail())
+        self.assertEqual(self.db.pool.connection.done, ["rollback"])
+
+    def test_stream(self):
+        async def read(format):
+            return [row async for row in await self.db.stream("SELECT id, name FROM t", format=format)]
+
+        self.assertEqual(asyncio.run(read("list"))[1], {"id": 2, "name": "b"})
+        rows = asyncio.run(read(None))
+        self.assertEqual([r.name for r in rows], ["a", "b"])
+        self.assertEqual(self.db.pool.connection.done, ["commit", "commit"])
+        self.assertTrue(self.db.pool.connection.cursors[-1].closed)
+
+    def test_stream_table(self):
+        async def read():
+            result = await self.db.stream("SELECT id, name FROM t", format="table")
+            return result.header, [row async for row in result.data]
+
+        header, rows = asyncio.run(read())
+        self.assertEqual(header, ("id", "name"))
+        self.assertEqual(rows, ROWS)
+
+    def test_stream_close_early(self):
+        async def read():
+            async with self.db.transaction() as t:
+                async with await t.stream("SELECT id, name FROM t") as rows:
+                    first = await rows.__anext__()
+                self.assertTrue(self.db.pool.connection.cursors[-1].closed)
+                self.assertEqual(self.db.pool.connection.done, [])
+                return first
+
+        self.assertEqual(asyncio.run(read()).name, "a")
+        self.assertEqual(self.db.pool.connection.done, ["commit"])
+
+    def test_stream_error(self):
+        async def read():
+            await self.db.stream("SELECT * FROM missing")
+
+        with self.assertRaises(Exception):
+            asyncio.run(read())
+        self.assertTrue(self.db.pool.connection.cursors[-1].closed)
+        self.assertEqual(self.db.pool.connection.done, ["rollback"])
+
+
+class _Pool(object):
+    def __init__(self):
+        self.connection = _Connection()
+
+    def acquire(self):
+        return _Context(self.connection)
+
+
+class _Context(object):
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        async def value():
+            return self.value
+
+        return value().__await__()
+
+    async def __aenter__(self):
+        return self.value
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class _Connection(object):
+    def __init__(self):
+        self.executed = []
+        self.done = []
+        self.cursors = []
+
+    def cursor(self, cursor_class=None):
+        cursor = _Cursor(self)
+        self.cursors.append(cursor)
+        return _Context(cursor)
+
+    async def commit(self):
+        self.done.append("commit")
+
+    async def rollback(self):
+        self.done.append("rollback")
+
+
+class _Cursor(object):
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self.rows = []
+        self.closed = False
+
+    async def execute(self, sql):
+        self.connection.executed.append(sql)
+        if "missing" in sql:
+            raise Exception("Table 'test.missing' doesn't exist")
+        if "SELECT" in sql:
+            self.description = [("id",), ("name",)]
+            self.rows = list(ROWS)
+
+    async def fetchall(self):
+        return self.rows
+
+    async def fetchone(self):
+        if self.rows:
+            return self.rows.pop(0)
+        return None
+
+    async def close(self):
+        self.closed = True
+
+    async def nextset(self):
+        return None
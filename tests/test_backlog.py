@@ -0,0 +1,108 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql import mysql
+from jx_mysql.instrument import Instrument
+from jx_mysql.mysql import PACKET_MARGIN, MySql
+from tests.fake_mysql import FakeServer
+
+BUDGET = 200  # BYTES OF max_allowed_packet LEFT FOR STATEMENTS
+
+
+class Recorder(Instrument):
+    def __init__(self):
+        self.statements = []
+
+    def statement(self, db, sql, duration, rows, num_bytes, mode):
+        self.statements.append((sql, rows, mode))
+
+
+class TestBacklog(FuzzyTestCase):
+    def setUp(self):
+        self.max_batch_size = mysql.MAX_BATCH_SIZE
+        self.server = FakeServer(max_allowed_packet=PACKET_MARGIN + BUDGET).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        mysql.MAX_BATCH_SIZE = self.max_batch_size
+
+    def batches(self):
+        return [r for _, r in self.server.requests if r not in ("SELECT @@max_allowed_packet", "COMMIT")]
+
+    def test_one_round_trip(self):
+        db = MySql(host="localhost")
+        with db.transaction():
+            for i in range(3):
+                db.execute("DELETE FROM person WHERE id=" + str(i))
+        self.assertEqual(
+            self.batches(),
+            ["DELETE FROM person WHERE id=0\n;\nDELETE FROM person WHERE id=1\n;\nDELETE FROM person WHERE id=2"],
+        )
+
+    def test_byte_budget(self):
+        statements = ["UPDATE person SET name='" + "x" * 40 + "' WHERE id=" + str(i) for i in range(20)]
+        db = MySql(host="localhost")
+        with db.transaction():
+            for s in statements:
+                db.execute(s)
+        batches = self.batches()
+        self.assertGreater(len(batches), 1)
+        for b in batches:
+            self.assertLessEqual(len(b.encode("utf8")), BUDGET)
+        self.assertEqual(self.server.sent[:-1], statements)
+        self.assertEqual(self.server.sent[-1], "COMMIT")
+
+    def test_byte_budget_counts_utf8(self):
+        statements = ["UPDATE person SET name='" + "é" * 40 + "' WHERE id=" + str(i) for i in range(20)]
+        db = MySql(host="localhost")
+        with db.transaction():
+            for s in statements:
+                db.execute(s)
+        for b in self.batches():
+            self.assertLessEqual(len(b.encode("utf8")), BUDGET)
+
+    def test_max_batch_size(self):
+        mysql.MAX_BATCH_SIZE = 3
+        db = MySql(host="localhost")
+        with db.transaction():
+            for i in range(7):
+                db.execute("DELETE FROM t WHERE id=" + str(i))
+        self.assertEqual([len(b.split(";\n")) for b in self.batches()], [3, 3, 1])
+
+    def test_every_result_is_read(self):
+        self.server.result("id=1", [], [], rowcount=5)
+        recorder = Recorder()
+        db = MySql(host="localhost", instrument=recorder)
+        with db.transaction():
+            for i in range(3):
+                db.execute("DELETE FROM t WHERE id=" + str(i))
+        self.assertEqual(
+            recorder.statements,
+            [
+                ("DELETE FROM t WHERE id=0", 1, "backlog"),
+                ("DELETE FROM t WHERE id=1", 5, "backlog"),
+                ("DELETE FROM t WHERE id=2", 1, "backlog"),
+            ],
+        )
+
+    def test_error_names_the_statement(self):
+        self.server.fail("id=1", Exception("Duplicate entry"))
+        db = MySql(host="localhost")
+        with self.assertRaises(Exception) as context:
+            with db.transaction():
+                for i in range(3):
+                    db.execute("DELETE FROM t WHERE id=" + str(i))
+        self.assertIn("DELETE FROM t WHERE id=1", str(context.exception))
+        self.assertNotIn("id=2", str(context.exception))
+        self.assertNotIn("COMMIT", self.server.sent)
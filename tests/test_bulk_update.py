@@ -0,0 +1,107 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.mysql import MySql, _chunk_bytes, _sql_update_list, _sql_upsert
+from tests.fake_mysql import FakeServer
+
+
+def _squeeze(sql):
+    return " ".join(sql.split())
+
+
+class TestBulkUpdate(FuzzyTestCase):
+    def test_upsert(self):
+        prefix, suffix = _sql_upsert("person", ["id"], ("id", "name"))
+        self.assertEqual(_squeeze(prefix), "INSERT INTO person ( id , name ) VALUES")
+        self.assertEqual(_squeeze(suffix), "ON DUPLICATE KEY UPDATE name = VALUES( name )")
+
+    def test_upsert_only_key(self):
+        _, suffix = _sql_upsert("person", ["id"], ("id",))
+        self.assertEqual(_squeeze(suffix), "ON DUPLICATE KEY UPDATE id = id")
+
+    def test_later_update_wins(self):
+        sql = _sql_update_list("person", [("(id=1)", {"name": "'a'"}, {"id"}), ("(id=1)", {"name": "'b'"}, {"id"})])
+        self.assertEqual(
+            _squeeze(sql),
+            "UPDATE person SET name = CASE WHEN (id=1) THEN 'b' WHEN (id=1) THEN 'a' ELSE name END"
+            " WHERE (id=1) OR (id=1)",
+        )
+
+    def test_where_columns_set_last(self):
+        # MySQL ASSIGNS LEFT TO RIGHT; x MUST BE SET BEFORE status CHANGES
+        sql = _sql_update_list(
+            "person",
+            [
+                ("(status='new')", {"status": "'old'", "x": "1"}, {"status"}),
+                ("(id=2)", {"x": "2"}, {"id"}),
+            ],
+        )
+        self.assertEqual(
+            _squeeze(sql),
+            "UPDATE person SET x = CASE WHEN (id=2) THEN 2 WHEN (status='new') THEN 1 ELSE x END,"
+            " status = CASE WHEN (status='new') THEN 'old' ELSE status END"
+            " WHERE (status='new') OR (id=2)",
+        )
+
+    def test_single_update(self):
+        sql = _sql_update_list("person", [("(status='new')", {"status": "'old'", "x": "1"}, {"status"})])
+        self.assertEqual(_squeeze(sql), "UPDATE person SET status = 'old', x = 1 WHERE (status='new')")
+
+    def test_chunks_fit_budget(self):
+        chunks = list(_chunk_bytes(["x" * 10] * 25, len, 50, None))
+        self.assertEqual([len(c) for c in chunks], [4, 4, 4, 4, 4, 4, 1])
+        chunks = list(_chunk_bytes(["x"] * 25, len, 1000, 10))
+        self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+
+
+class TestUpdateList(FuzzyTestCase):
+    def setUp(self):
+        self.server = FakeServer().__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def update_list(self, updates):
+        db = MySql(host="localhost")
+        with db.transaction():
+            db.update_list("person", updates)
+        return [_squeeze(s) for s in self.server.sent[:-1]]
+
+    def test_one_statement(self):
+        sent = self.update_list([({"id": 1}, {"name": "a"}), ({"id": 2}, {"name": "b", "x": 3})])
+        self.assertEqual(len(sent), 1)
+
+    def test_set_own_where_columns(self):
+        # THE CASE FOR b WOULD SEE THE NEW a
+        sent = self.update_list([({"a": 1, "b": 2}, {"a": 3, "b": 4}), ({"id": 7}, {"x": 1})])
+        self.assertEqual(len(sent), 2)
+
+    def test_set_then_tested(self):
+        # IN ORDER, THE ROWS MADE old BY THE FIRST UPDATE ALSO GET x=1
+        sent = self.update_list([({"status": "new"}, {"status": "old"}), ({"status": "old"}, {"x": 1})])
+        self.assertEqual(
+            sent,
+            [
+                "UPDATE person SET status = 'old' WHERE ( status = 'new' )",
+                "UPDATE person SET x = 1 WHERE ( status = 'old' )",
+            ],
+        )
+
+    def test_chain(self):
+        # IN ORDER, c=1 BECOMES 5, THEN 7
+        sent = self.update_list([({"c": 1}, {"c": 5}), ({"c": 5}, {"c": 7})])
+        self.assertEqual(
+            sent,
+            ["UPDATE person SET c = 5 WHERE ( c = 1 )", "UPDATE person SET c = 7 WHERE ( c = 5 )"],
+        )
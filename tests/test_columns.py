@@ -0,0 +1,104 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import numpy
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql import mysql
+from jx_mysql.mysql import FIELD_TYPE, MySql
+from tests.fake_mysql import FakeServer
+
+COLUMNS = [
+    ("id", FIELD_TYPE.LONGLONG),
+    ("score", FIELD_TYPE.DOUBLE),
+    ("name", FIELD_TYPE.VAR_STRING),
+    ("blob", FIELD_TYPE.BLOB),
+]
+ROWS = [
+    (1, 0.5, "a", b"x"),
+    (None, None, None, None),
+    (3, 1.5, "c", "é".encode("utf8")),
+]
+
+
+class TestColumns(FuzzyTestCase):
+    def setUp(self):
+        self.chunk_size = mysql.COLUMN_CHUNK_SIZE
+        self.server = FakeServer().__enter__()
+        self.server.result("FROM person", COLUMNS, ROWS)
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        mysql.COLUMN_CHUNK_SIZE = self.chunk_size
+
+    def test_null_masks(self):
+        db = MySql(host="localhost")
+        for result in (
+            db.query("SELECT * FROM person", format="columns"),
+            db.column_query("SELECT * FROM person", format="columns"),
+        ):
+            self.assertEqual(result.header, ("id", "score", "name", "blob"))
+            ids, scores, names, blobs = result.data
+
+            self.assertEqual(ids.dtype, numpy.int64)
+            self.assertEqual(list(ids.mask), [False, True, False])
+            self.assertEqual(list(ids.compressed()), [1, 3])
+            self.assertEqual(scores.dtype, numpy.float64)
+            self.assertEqual(list(scores.mask), [False, True, False])
+            self.assertEqual(list(scores.compressed()), [0.5, 1.5])
+
+            # NOT NUMBERS, SO NOT MASKED
+            self.assertEqual(names.dtype, object)
+            self.assertFalse(isinstance(names, numpy.ma.MaskedArray))
+            self.assertEqual(list(names), ["a", None, "c"])
+
+    def test_binary_decoded(self):
+        db = MySql(host="localhost")
+        result = db.query("SELECT * FROM person", format="columns")
+        self.assertEqual(list(result.data[3]), ["x", None, "é"])
+
+    def test_chunks(self):
+        mysql.COLUMN_CHUNK_SIZE = 2
+        db = MySql(host="localhost")
+        result = db.query("SELECT * FROM person", format="columns")
+        ids = result.data[0]
+        self.assertEqual(ids.dtype, numpy.int64)
+        self.assertEqual(list(ids.mask), [False, True, False])
+        self.assertEqual(list(result.data[3]), ["x", None, "é"])
+
+    def test_unsigned_overflow(self):
+        big = 2 ** 64 - 1
+        self.server.result("FROM counter", [("n", FIELD_TYPE.LONGLONG)], [(big,), (None,), (1,)])
+        db = MySql(host="localhost")
+        n = db.query("SELECT n FROM counter", format="columns").data[0]
+        self.assertEqual(n.dtype, object)
+        self.assertEqual(list(n.mask), [False, True, False])
+        self.assertEqual(list(n.compressed()), [big, 1])
+
+    def test_unsigned_overflow_in_later_chunk(self):
+        mysql.COLUMN_CHUNK_SIZE = 2
+        big = 2 ** 64 - 1
+        self.server.result("FROM counter", [("n", FIELD_TYPE.LONGLONG)], [(1,), (None,), (big,)])
+        db = MySql(host="localhost")
+        n = db.query("SELECT n FROM counter", format="columns").data[0]
+        self.assertEqual(list(n.mask), [False, True, False])
+        self.assertEqual(list(n.compressed()), [1, big])
+
+    def test_empty(self):
+        self.server.result("FROM nobody", COLUMNS, [])
+        db = MySql(host="localhost")
+        result = db.query("SELECT * FROM nobody", format="columns")
+        ids, scores, names, blobs = result.data
+        self.assertEqual(ids.dtype, numpy.int64)
+        self.assertEqual(len(ids), 0)
+        self.assertEqual(scores.dtype, numpy.float64)
+        self.assertEqual(names.dtype, object)
@@ -0,0 +1,53 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.mysql import _Workers, _batch_maker
+
+COLUMNS = ("id", "name")
+TYPES = (3, 253)  # LONG, VAR_STRING
+ROWS = [(1, "a"), (2, None), (None, "c")]
+
+
+class TestForall(FuzzyTestCase):
+    def test_batch_formats(self):
+        rows = _batch_maker(COLUMNS, TYPES, None)(ROWS)
+        self.assertEqual([r.id for r in rows], [1, 2, None])
+
+        dicts = _batch_maker(COLUMNS, TYPES, "list")(ROWS)
+        self.assertEqual(dicts[1], {"id": 2, "name": None})
+
+        table = _batch_maker(COLUMNS, TYPES, "table")(ROWS)
+        self.assertEqual(table.header, COLUMNS)
+        self.assertEqual(table.data[2], (None, "c"))
+
+        columns = _batch_maker(COLUMNS, TYPES, "columns")(ROWS)
+        ids = columns.data[0]
+        self.assertEqual(list(ids.mask), [False, False, True])
+        self.assertEqual(list(columns.data[1]), ["a", None, "c"])
+
+    def test_workers_see_every_batch(self):
+        seen = []
+        with _Workers(seen.append, 3) as add:
+            for i in range(100):
+                add([i])
+        self.assertEqual(sorted(i for (i,) in seen), list(range(100)))
+
+    def test_worker_error_is_raised(self):
+        def fail(batch):
+            raise Exception("expected failure")
+
+        with self.assertRaises(Exception):
+            with _Workers(fail, 2) as add:
+                for i in range(100):
+                    add([i])
@@ -0,0 +1,76 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql import mysql
+from jx_mysql.mysql import MySql, _sql_insert_new
+from tests.fake_mysql import FakeServer
+
+
+def _squeeze(sql):
+    return " ".join(str(sql).split())
+
+
+class TestInsertNew(FuzzyTestCase):
+    def setUp(self):
+        self.batch_size = mysql.INSERT_NEW_BATCH_SIZE
+        self.server = FakeServer().__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        mysql.INSERT_NEW_BATCH_SIZE = self.batch_size
+
+    def test_sql(self):
+        sql = _sql_insert_new("person", ["id"], ("id", "name"), [{"id": 1, "name": "a"}, {"id": 2, "name": None}])
+        self.assertEqual(
+            _squeeze(sql),
+            "INSERT INTO person ( id , name )SELECT a.* FROM"
+            " ( SELECT 1 AS id , 'a' AS name UNION ALL SELECT 2, NULL ) AS a"
+            " WHERE NOT EXISTS ( SELECT 1 FROM person AS b WHERE b.id <=> a.id )",
+        )
+
+    def test_compound_key(self):
+        sql = _sql_insert_new("person", ["first", "last"], ("first", "last"), [{"first": "a", "last": "b"}])
+        self.assertIn("WHERE b.first <=> a.first AND b.last <=> a.last", _squeeze(sql))
+
+    def test_first_record_wins(self):
+        db = MySql(host="localhost")
+        with db.transaction():
+            db.insert_newlist(
+                "person",
+                "id",
+                [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 1, "name": "c"}, {"id": 2, "name": "d"}],
+            )
+        (insert, commit) = self.server.sent
+        self.assertIn("SELECT 1 AS id , 'a' AS name UNION ALL SELECT 2, 'b' )", insert)
+        self.assertNotIn("'c'", insert)
+        self.assertNotIn("'d'", insert)
+        self.assertEqual(commit, "COMMIT")
+
+    def test_first_record_wins_across_columns(self):
+        # A DUPLICATE WITH DIFFERENT COLUMNS IS STILL A DUPLICATE
+        db = MySql(host="localhost")
+        with db.transaction():
+            db.insert_newlist("person", "id", [{"id": 1}, {"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+        inserts = self.server.sent[:-1]
+        self.assertEqual(len(inserts), 2)
+        self.assertIn("SELECT 1 AS id ) AS a", inserts[0])
+        self.assertIn("SELECT 2 AS id , 'b' AS name ) AS a", inserts[1])
+
+    def test_batches(self):
+        mysql.INSERT_NEW_BATCH_SIZE = 2
+        db = MySql(host="localhost")
+        with db.transaction():
+            db.insert_newlist("person", "id", [{"id": i} for i in range(5)])
+        inserts = self.server.sent[:-1]
+        self.assertEqual([i.count("SELECT") - 2 for i in inserts], [2, 2, 1])
@@ -0,0 +1,201 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import tempfile
+
+from mo_dots import Data
+from mo_json import json2value
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.instrument import Instrument, Metrics, SlowQueryLog, fingerprint, new_slow_log, new_sql_log
+from jx_mysql.mysql import MySql
+from tests.fake_mysql import FakeServer
+
+PLAN = '{"query_block": {"select_id": 1}}'
+
+
+class TestFingerprint(FuzzyTestCase):
+    def test_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a='it''s' AND b=\"x\" AND c=42 AND d=1.5e3 AND e=0xFF AND f IS NULL"),
+            "SELECT * FROM t WHERE a=? AND b=? AND c=? AND d=? AND e=? AND f IS ?",
+        )
+
+    def test_identifiers_with_digits(self):
+        self.assertEqual(fingerprint("SELECT col1 FROM t2 WHERE id=3"), "SELECT col1 FROM t2 WHERE id=?")
+
+    def test_in_list(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3)"),
+            fingerprint("SELECT * FROM t WHERE id IN (4)"),
+        )
+        self.assertEqual(fingerprint("SELECT * FROM t WHERE id IN (1,2,3)"), "SELECT * FROM t WHERE id IN (...)")
+
+    def test_values_list(self):
+        self.assertEqual(
+            fingerprint("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y')"),
+            "INSERT INTO t (a, b) VALUES (...)",
+        )
+
+    def test_whitespace_and_comments(self):
+        self.assertEqual(
+            fingerprint("  SELECT\n\ta  -- the column\nFROM   t /* note */ WHERE a=1\n"),
+            "SELECT a FROM t WHERE a=?",
+        )
+
+    def test_quoted_names_and_hashes(self):
+        self.assertEqual(
+            fingerprint("SELECT `a\"b`, `c#1` FROM t WHERE a='#1' AND b=2"),
+            "SELECT `a\"b`, `c#1` FROM t WHERE a=? AND b=?",
+        )
+
+    def test_max_length(self):
+        result = fingerprint("SELECT " + ", ".join("column" + str(i) for i in range(100)) + " FROM t", 50)
+        self.assertEqual(len(result), 50)
+        self.assertTrue(result.endswith("..."))
+
+
+class TestMetrics(FuzzyTestCase):
+    def test_base_instrument_does_nothing(self):
+        Instrument().statement(None, "SELECT 1", 0.1, 1, 8, "direct")
+
+    def test_histogram(self):
+        metrics = Metrics(buckets=(0.1, 1))
+        metrics.statement(None, "SELECT * FROM t WHERE id=1", 0.05, 1, 26, "direct")
+        metrics.statement(None, "SELECT * FROM t WHERE id=2", 0.5, 3, 26, "direct")
+        metrics.statement(None, "SELECT * FROM t WHERE id=3", 5, 0, 26, "direct")
+
+        text = metrics.text()
+        labels = 'fingerprint="SELECT * FROM t WHERE id=?",mode="direct"'
+        self.assertIn("jx_mysql_statement_seconds_bucket{" + labels + ',le="0.1"} 1\n', text)
+        self.assertIn("jx_mysql_statement_seconds_bucket{" + labels + ',le="1.0"} 2\n', text)
+        self.assertIn("jx_mysql_statement_seconds_bucket{" + labels + ',le="+Inf"} 3\n', text)
+        self.assertIn("jx_mysql_statement_seconds_sum{" + labels + "} 5.55\n", text)
+        self.assertIn("jx_mysql_statement_seconds_count{" + labels + "} 3\n", text)
+        self.assertIn("jx_mysql_statement_rows_total{" + labels + "} 4\n", text)
+        self.assertIn("jx_mysql_statement_bytes_total{" + labels + "} 78\n", text)
+
+    def test_max_series(self):
+        metrics = Metrics(max_series=1)
+        metrics.statement(None, "SELECT a FROM t", 0.01, 1, 15, "direct")
+        metrics.statement(None, "SELECT b FROM t", 0.01, 1, 15, "direct")
+        metrics.statement(None, "SELECT c FROM t", 0.01, 1, 15, "backlog")
+        self.assertEqual(
+            sorted(metrics.series.keys()),
+            [("SELECT a FROM t", "direct"), ("other", "backlog"), ("other", "direct")],
+        )
+
+    def test_escape(self):
+        metrics = Metrics()
+        metrics.statement(None, 'SELECT `a"b` FROM t', 0.01, 1, 19, "direct")
+        self.assertIn('fingerprint="SELECT `a\\"b` FROM t"', metrics.text())
+
+
+class TestSqlLog(FuzzyTestCase):
+    def test_defaults(self):
+        log = new_sql_log(True)
+        self.assertEqual((log.sample, log.per_second, log.max_length), (1.0, 1.0, 200))
+        log = new_sql_log({"sample": 0.5})
+        self.assertEqual((log.sample, log.per_second), (0.5, 1.0))
+
+    def test_rate(self):
+        log = new_sql_log({"per_second": 2})
+        for i in range(5):
+            log.statement(None, "SELECT " + str(i), 0.01, 1, 8, "direct")
+        # A BURST OF TWO IS LOGGED, THE REST ARE COUNTED
+        self.assertEqual(log.skipped, 3)
+
+    def test_sample(self):
+        log = new_sql_log({"sample": 0, "per_second": 1})
+        for i in range(5):
+            log.statement(None, "SELECT " + str(i), 0.01, 1, 8, "direct")
+        self.assertEqual((log.skipped, log.allowance), (0, 1))
+
+
+class TestSlowQueryLog(FuzzyTestCase):
+    def test_defaults(self):
+        log = new_slow_log(True)
+        self.assertEqual((log.threshold, log.explain, log.filename), (1.0, True, None))
+
+    def test_threshold(self):
+        log = new_slow_log({"threshold": 0.5, "explain": False})
+        log.statement(None, "SELECT * FROM t WHERE id=1", 0.1, 1, 26, "direct")
+        log.statement(None, "SELECT * FROM t WHERE id=2", 0.5, 1, 26, "backlog")
+        log.statement(None, "SELECT * FROM t WHERE id=3", 2, 1, 26, "direct")
+        self.assertEqual(
+            [(e.fingerprint, e.duration, e.mode) for e in log.recent()],
+            [("SELECT * FROM t WHERE id=?", 0.5, "backlog"), ("SELECT * FROM t WHERE id=?", 2, "direct")],
+        )
+
+    def test_size(self):
+        log = new_slow_log({"threshold": 0, "size": 2, "explain": False})
+        for i in range(3):
+            log.statement(None, "SELECT a" + str(i) + " FROM t", 0.1, 1, 14, "direct")
+        self.assertEqual([e.fingerprint for e in log.recent()], ["SELECT a1 FROM t", "SELECT a2 FROM t"])
+
+    def test_file(self):
+        filename = os.path.join(tempfile.mkdtemp(), "slow.json")
+        log = new_slow_log({"threshold": 1, "filename": filename, "explain": False})
+        log.statement(None, "DELETE FROM t WHERE id=1", 3, 1, 24, "direct")
+        with open(filename, encoding="utf8") as file:
+            lines = [json2value(line) for line in file]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0].fingerprint, "DELETE FROM t WHERE id=?")
+
+    def test_explain(self):
+        with FakeServer() as server:
+            server.result("EXPLAIN", ["EXPLAIN"], [(PLAN,)])
+            db = MySql(host="localhost", schema="test")
+            log = SlowQueryLog(threshold=1)
+            log.statement(db, "SELECT * FROM t WHERE id=1", 2, 1, 26, "direct")
+            log.statement(db, "DROP TABLE t", 2, 0, 12, "direct")
+            log.close()
+            db.close()
+
+        # THE PLAN ARRIVES LATER, SO THE ORDER MAY CHANGE
+        drop, select = sorted(log.recent(), key=lambda e: e.fingerprint)
+        self.assertEqual(drop.fingerprint, "DROP TABLE t")
+        self.assertEqual(drop.explain, None)
+        self.assertEqual(select.explain.query_block.select_id, 1)
+        # ON ANOTHER CONNECTION, NOT THE ONE THE CALLER IS USING
+        self.assertEqual(
+            [(n, r) for n, r in server.requests if "EXPLAIN" in r],
+            [(1, "EXPLAIN FORMAT=JSON SELECT * FROM t WHERE id=1")],
+        )
+
+    def test_explain_on_replica(self):
+        with FakeServer() as server:
+            server.result("EXPLAIN", ["EXPLAIN"], [(PLAN,)])
+            db = MySql(host="localhost", schema="test")
+            db.replica = Data(settings={"host": "127.0.0.1"})
+            log = SlowQueryLog(threshold=1)
+            log.statement(db, "SELECT * FROM t", 2, 1, 15, "direct")
+            log.close()
+            db.replica = None
+            db.close()
+
+        self.assertEqual(log.recent()[0].explain.query_block.select_id, 1)
+        self.assertEqual([c.kwargs["host"] for c in server.connections], ["localhost", "127.0.0.1"])
+
+    def test_explain_error(self):
+        with FakeServer() as server:
+            server.fail("EXPLAIN", Exception("You have an error in your SQL syntax"))
+            db = MySql(host="localhost", schema="test")
+            log = SlowQueryLog(threshold=1)
+            log.statement(db, "SELECT * FROM t", 2, 1, 15, "direct")
+            log.close()
+            db.close()
+
+        entry = log.recent()[0]
+        self.assertEqual(entry.explain, None)
+        self.assertIn("error in your SQL syntax", entry.explain_error)
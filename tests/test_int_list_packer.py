@@ -0,0 +1,55 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import random
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.mysql import _int_list_packer, int_list_packer
+
+STEPS = [[1], [1, 2], [1, 2, 3], [1, 1, 1, 2, 3, 5], [1, 2, 3, 4, 5, 50], [0, 1, 2, 3, 10], [2], [3]]
+
+
+class TestIntListPacker(FuzzyTestCase):
+    def test_structure(self):
+        values = list(range(100, 200)) + [150] + [5, 7] + list(range(300, 340, 2))
+        values.remove(120)
+        result = int_list_packer("id", values)
+        expected = {"or": [
+            {"terms": {"id": [5, 7] + list(range(300, 340, 2))}},
+            {"and": [
+                {"or": [{"range": {"id": {"gte": 100, "lte": 199}}}]},
+                {"not": {"terms": {"id": [120]}}},
+            ]},
+        ]}
+        self.assertEqual(result, expected)
+
+    def test_no_ranges(self):
+        values = [9, 1, 5]
+        self.assertEqual(int_list_packer("id", values), {"terms": {"id": values}})
+
+    def test_same_as_scalar(self):
+        generator = random.Random(42)
+        for _ in range(500):
+            steps = generator.choice(STEPS)
+            values = [generator.randint(-50, 50)]
+            for _ in range(generator.randint(1, 300)):
+                values.append(values[-1] + generator.choice(steps))
+            generator.shuffle(values)
+            self.assertEqual(int_list_packer("x", values), _int_list_packer("x", values))
+
+    def test_bigger_than_int64(self):
+        for start in [2 ** 63, 2 ** 64 - 50, 2 ** 63 - 5, 2 ** 70]:
+            values = [start + i for i in range(40)]
+            result = int_list_packer("id", values)
+            self.assertEqual(result, {"or": [{"range": {"id": {"gte": start, "lte": start + 39}}}]})
+            self.assertEqual(result, _int_list_packer("id", values))
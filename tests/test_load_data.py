@@ -0,0 +1,85 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from datetime import datetime
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.mysql import MySql, tsv_value
+from tests.fake_mysql import FakeServer
+
+ROWS = [(1, "a\tb"), (2, "c\nd"), (3, None)]
+
+
+class TestTsvValue(FuzzyTestCase):
+    def test_escaping(self):
+        self.assertEqual(tsv_value("a\tb"), "a\\tb")
+        self.assertEqual(tsv_value("a\nb\r"), "a\\nb\\r")
+        self.assertEqual(tsv_value("a\\b"), "a\\\\b")
+        self.assertEqual(tsv_value("a\0b"), "a\\0b")
+        self.assertEqual(tsv_value("\\N"), "\\\\N")
+
+    def test_null(self):
+        self.assertEqual(tsv_value(None), "\\N")
+        self.assertEqual(tsv_value(""), "")
+
+    def test_other_types(self):
+        self.assertEqual(tsv_value(True), "1")
+        self.assertEqual(tsv_value(False), "0")
+        self.assertEqual(tsv_value(42), "42")
+        self.assertEqual(tsv_value(1.5), "1.5")
+        self.assertEqual(tsv_value(datetime(2020, 1, 2, 3, 4, 5)), "2020-01-02 03:04:05.000000")
+        self.assertEqual(tsv_value({"a": "x\ty"}), '{"a":"x\\\\ty"}')
+
+
+class TestLoadData(FuzzyTestCase):
+    def setUp(self):
+        self.server = FakeServer().__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_load(self):
+        self.server.result("LOAD DATA", [], [], rowcount=len(ROWS))
+        db = MySql(host="localhost", bulk_load=2)
+        with db.transaction():
+            db.insert_rows("person", ["id", "name"], ROWS)
+        self.assertTrue(self.server.sent[0].startswith("LOAD DATA LOCAL INFILE"))
+        self.assertIn("INTO TABLE person", self.server.sent[0])
+        self.assertEqual(self.server.loaded, ["1\ta\\tb\n2\tc\\nd\n3\t\\N\n"])
+
+    def test_small_inserts_are_not_loaded(self):
+        db = MySql(host="localhost", bulk_load=10)
+        with db.transaction():
+            db.insert_rows("person", ["id", "name"], ROWS)
+        self.assertTrue(self.server.sent[0].startswith("INSERT INTO"))
+        self.assertEqual(self.server.loaded, [])
+
+    def test_dropped_rows(self):
+        self.server.result("LOAD DATA", [], [], rowcount=len(ROWS) - 1)
+        db = MySql(host="localhost", bulk_load=2)
+        with self.assertRaises(Exception) as context:
+            with db.transaction():
+                db.insert_rows("person", ["id", "name"], ROWS)
+        self.assertIn("Loaded 2 of 3 rows", context.exception)
+        self.assertNotIn("COMMIT", self.server.sent)
+
+    def test_warnings(self):
+        self.server.result("LOAD DATA", [], [], rowcount=len(ROWS))
+        self.server.warnings = [("Warning", 1265, "Data truncated for column 'name' at row 2")]
+        db = MySql(host="localhost", bulk_load=2)
+        with self.assertRaises(Exception) as context:
+            with db.transaction():
+                db.insert_rows("person", ["id", "name"], ROWS)
+        self.assertIn("Data truncated", context.exception)
+        self.assertIn("SHOW WARNINGS LIMIT 10", self.server.sent)
+        self.assertNotIn("COMMIT", self.server.sent)
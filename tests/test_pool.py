@@ -0,0 +1,86 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.pool import ConnectionPool
+
+
+class TestPool(FuzzyTestCase):
+    def test_checkout_and_return(self):
+        connect = _Connect()
+        pool = ConnectionPool(connect, max_size=2)
+        first = pool.checkout()
+        pool.checkin(first)
+        self.assertTrue(pool.checkout() is first)
+        self.assertEqual(connect.made, 1)
+        self.assertEqual(pool.stats().in_use, 1)
+
+    def test_max_size(self):
+        pool = ConnectionPool(_Connect(), max_size=2, timeout=0.1)
+        a = pool.checkout()
+        b = pool.checkout()
+        self.assertFalse(a is b)
+        with self.assertRaises(Exception):
+            pool.checkout()
+        pool.checkin(a)
+        self.assertTrue(pool.checkout() is a)
+
+    def test_dead_connection_is_discarded(self):
+        connect = _Connect()
+        pool = ConnectionPool(connect, max_size=1, check_after=0)
+        dead = pool.checkout()
+        pool.checkin(dead)
+        dead.alive = False
+        fresh = pool.checkout()
+        self.assertFalse(fresh is dead)
+        self.assertTrue(dead.closed)
+        self.assertEqual(connect.made, 2)
+
+    def test_closed_connection_is_not_kept(self):
+        pool = ConnectionPool(_Connect(), max_size=1)
+        connection = pool.checkout()
+        connection.open = False
+        pool.checkin(connection)
+        self.assertEqual(pool.stats().idle, 0)
+        self.assertEqual(pool.stats().closed, 1)
+
+    def test_discard(self):
+        pool = ConnectionPool(_Connect(), max_size=1)
+        connection = pool.checkout()
+        pool.discard(connection)
+        self.assertTrue(connection.closed)
+        self.assertFalse(pool.checkout() is connection)
+
+
+class _Connect(object):
+    def __init__(self):
+        self.made = 0
+
+    def __call__(self):
+        self.made += 1
+        return _Connection()
+
+
+class _Connection(object):
+    def __init__(self):
+        self.open = True
+        self.alive = True
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise Exception("connection lost")
+
+    def close(self):
+        self.open = False
+        self.closed = True
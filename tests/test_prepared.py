@@ -0,0 +1,99 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql import mysql
+from jx_mysql.mysql import MySql
+from tests.fake_mysql import FakeServer
+
+
+class TestPrepared(FuzzyTestCase):
+    def setUp(self):
+        self.max_prepared = mysql.MAX_PREPARED
+        self.server = FakeServer().__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        mysql.MAX_PREPARED = self.max_prepared
+
+    def test_execute(self):
+        db = MySql(host="localhost")
+        with db.transaction():
+            db.execute("UPDATE person SET name={{name}} WHERE id={{id}}", {"name": "a", "id": 1}, prepared=True)
+            db.execute("UPDATE person SET name={{name}} WHERE id={{id}}", {"name": "b", "id": 2}, prepared=True)
+        name = _statement_name(self.server.sent)
+        self.assertEqual(
+            self.server.sent,
+            [
+                "PREPARE " + name + " FROM 'UPDATE person SET name=? WHERE id=?'",
+                "SET @jx_param0='a', @jx_param1=1",
+                "EXECUTE " + name + " USING @jx_param0, @jx_param1",
+                "SET @jx_param0='b', @jx_param1=2",
+                "EXECUTE " + name + " USING @jx_param0, @jx_param1",
+                "COMMIT",
+            ],
+        )
+
+    def test_query_is_one_round_trip(self):
+        self.server.result("EXECUTE", ["name"], [("a",)])
+        db = MySql(host="localhost")
+        db.query("SELECT name FROM person WHERE id={{id}}", {"id": 1}, prepared=True)
+        result = db.query("SELECT name FROM person WHERE id={{id}}", {"id": 1}, prepared=True, format="list")
+        self.assertEqual(result, [{"name": "a"}])
+        requests = [r for _, r in self.server.requests if "EXECUTE" in r]
+        self.assertEqual(len(requests), 2)
+        self.assertTrue(requests[1].startswith("SET @jx_param0=1;\nEXECUTE "))
+
+    def test_backlog_sent_before_prepare(self):
+        db = MySql(host="localhost")
+        with db.transaction():
+            db.execute("CREATE TABLE person (id INTEGER, name VARCHAR(20))")
+            db.execute("INSERT INTO person (id, name) VALUES ({{id}}, {{name}})", {"id": 1, "name": "a"}, prepared=True)
+        self.assertEqual(self.server.sent[0], "CREATE TABLE person (id INTEGER, name VARCHAR(20))")
+        self.assertTrue(self.server.sent[1].startswith("PREPARE "))
+
+    def test_deferred_deallocate(self):
+        mysql.MAX_PREPARED = 1
+        db = MySql(host="localhost")
+        with db.transaction():
+            db.execute("UPDATE person SET name={{name}} WHERE id=1", {"name": "a"}, prepared=True)
+            # FORMATTED TEMPLATES ARE NOT PREPARED, BUT DO PUSH THE FIRST OUT OF THE CACHE
+            db.execute("UPDATE person SET name={{name|quote}} WHERE id=2", {"name": "b"}, prepared=True)
+        name = _statement_name(self.server.sent)
+        self.assertEqual(
+            self.server.sent,
+            [
+                "PREPARE " + name + " FROM 'UPDATE person SET name=? WHERE id=1'",
+                "SET @jx_param0='a'",
+                "EXECUTE " + name + " USING @jx_param0",
+                "DEALLOCATE PREPARE " + name,
+                "UPDATE person SET name=\"'b'\" WHERE id=2",
+                "COMMIT",
+            ],
+        )
+
+    def test_preamble_is_part_of_statement(self):
+        # BOTH BORROW THE SAME CONNECTION FROM THE POOL
+        first = MySql(host="localhost", username="preamble", preamble="first", pool=True)
+        second = MySql(host="localhost", username="preamble", preamble="second", pool=True)
+        for db in (first, second):
+            with db.transaction():
+                db.execute("UPDATE person SET name={{name}}", {"name": "a"}, prepared=True)
+        self.assertEqual(len(self.server.connections), 1)
+        prepares = [s for s in self.server.sent if s.startswith("PREPARE")]
+        self.assertEqual(len(prepares), 2)
+        self.assertIn("# first", prepares[0])
+        self.assertIn("# second", prepares[1])
+
+def _statement_name(sent):
+    return sent[0].split()[1]
@@ -0,0 +1,79 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from time import sleep
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.query_cache import QueryCache
+
+SQL = "SELECT id, name FROM people WHERE id=1"
+KEY = ("test", SQL)
+
+
+class TestQueryCache(FuzzyTestCase):
+    def test_miss_then_hit(self):
+        cache = QueryCache()
+        self.assertEqual(cache.get(KEY), None)
+        cache.add(KEY, ("id", "name"), [(1, "a")], cache.tables(SQL))
+        self.assertEqual(cache.get(KEY), (("id", "name"), ((1, "a"),)))
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 1))
+
+    def test_expiry(self):
+        cache = QueryCache(ttl=0.05)
+        cache.add(KEY, ("id", "name"), [(1, "a")], cache.tables(SQL))
+        sleep(0.1)
+        self.assertEqual(cache.get(KEY), None)
+        self.assertEqual(cache.stats().entries, 0)
+
+    def test_eviction(self):
+        cache = QueryCache(max_entries=1)
+        cache.add(("test", "SELECT 1 FROM a"), ("1",), [(1,)], {"a"})
+        cache.add(("test", "SELECT 1 FROM b"), ("1",), [(1,)], {"b"})
+        self.assertEqual(cache.get(("test", "SELECT 1 FROM a")), None)
+        self.assertEqual(cache.stats().evictions, 1)
+
+    def test_invalidate_on_write(self):
+        cache = QueryCache()
+        cache.add(KEY, ("id", "name"), [(1, "a")], cache.tables(SQL))
+        cache.add(("test", "SELECT 1 FROM other"), ("1",), [(1,)], {"other"})
+
+        self.assertFalse(cache.invalidate("SELECT * FROM people"))
+        self.assertTrue(cache.invalidate("UPDATE people SET name='people' WHERE id=1"))
+        self.assertEqual(cache.get(KEY), None)
+        self.assertEqual(cache.get(("test", "SELECT 1 FROM other")), (("1",), ((1,),)))
+
+    def test_invalidate_unknown_target_clears(self):
+        cache = QueryCache()
+        cache.add(KEY, ("id", "name"), [(1, "a")], cache.tables(SQL))
+        cache.invalidate("CALL refresh()")
+        self.assertEqual(cache.stats().entries, 0)
+
+    def test_update_time_changed(self):
+        update_time = {"people": 1}
+        cache = QueryCache(check_after=0)
+        tables = cache.tables(SQL)
+        versions = cache.versions(tables, lambda t: update_time)
+        cache.add(KEY, ("id", "name"), [(1, "a")], tables, versions)
+        self.assertEqual(cache.get(KEY, lambda t: update_time), (("id", "name"), ((1, "a"),)))
+
+        update_time["people"] = 2
+        self.assertEqual(cache.get(KEY, lambda t: update_time), None)
+
+    def test_cacheable(self):
+        cache = QueryCache()
+        self.assertTrue(cache.cacheable(SQL))
+        self.assertTrue(cache.cacheable("SELECT 'RAND()' FROM t"))
+        self.assertFalse(cache.cacheable("SELECT RAND() FROM t"))
+        self.assertFalse(cache.cacheable("SELECT * FROM t FOR UPDATE"))
+        self.assertFalse(cache.cacheable("DELETE FROM t"))
@@ -0,0 +1,56 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from datetime import datetime
+
+from mo_dots import Data, Null
+from mo_testing.fuzzytestcase import FuzzyTestCase
+from mo_times import Date
+
+from jx_mysql.mysql import quote_column, quote_row, quote_value, quote_values
+
+VALUES = [
+    None,
+    Null,
+    True,
+    False,
+    42,
+    1.5,
+    float("nan"),
+    "it's a \"test\"\\\n\t\0",
+    Date("2020-01-01"),
+    datetime(2020, 1, 2, 3, 4, 5),
+    {"a": 1},
+    Data(b=2),
+    [1, 2],
+]
+
+
+class TestQuote(FuzzyTestCase):
+    def test_text(self):
+        self.assertEqual(str(quote_value("it's")), "'it''s'")
+        self.assertEqual(str(quote_value('a"b\\c\n')), "'a\\\"b\\\\c\\n'")
+
+    def test_row_same_as_value(self):
+        expected = [str(quote_value(v)) for v in VALUES]
+        self.assertEqual(str(quote_values(VALUES)), ", ".join(expected))
+        self.assertEqual(str(quote_row(VALUES)), "(" + ", ".join(expected) + ")")
+
+    def test_not_a_number(self):
+        self.assertEqual(str(quote_value(float("nan"))), "'nan'")
+        self.assertEqual(str(quote_value(None)).strip(), "NULL")
+        self.assertEqual(str(quote_value(True)).strip(), "1")
+
+    def test_quote_column(self):
+        self.assertEqual(str(quote_column("a", "b")), " a.b ")
+        self.assertEqual(str(quote_column("a b", "c`d")), " `a b`.`c``d` ")
+        self.assertTrue(quote_column("a", "b") is quote_column("a", "b"))
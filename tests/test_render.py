@@ -0,0 +1,34 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.mysql import quote_column, quote_value, sql_eq
+from jx_mysql.render import SqlBuffer
+
+
+class TestRender(FuzzyTestCase):
+    def test_same_as_str(self):
+        sql = sql_eq(name="é", id=None)
+        buffer = SqlBuffer()
+        buffer.write_sql(sql)
+        self.assertEqual(bytes(buffer), str(sql).encode("utf8"))
+
+    def test_reuse(self):
+        buffer = SqlBuffer()
+        buffer.write("SELECT ")
+        buffer.write_sql(quote_value("x"))
+        with memoryview(buffer) as view:
+            self.assertEqual(bytes(view), b"SELECT 'x'")
+        buffer.clear()
+        buffer.write_sql(quote_column("a"))
+        self.assertEqual(bytes(buffer), b" a ")
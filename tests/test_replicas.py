@@ -0,0 +1,77 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_dots import Data
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.replicas import ReplicaRouter
+
+
+class TestReplicas(FuzzyTestCase):
+    def test_fewest_connections(self):
+        router = ReplicaRouter([Data(host="a"), Data(host="b")])
+        first = router.choose()
+        second = router.choose()
+        self.assertNotEqual(first.settings.host, second.settings.host)
+        router.release(first)
+        self.assertEqual(router.choose().settings.host, first.settings.host)
+
+    def test_lagging_replica_is_skipped(self):
+        router = ReplicaRouter([Data(host="a"), Data(host="b")], max_lag=30)
+        a = router.choose()
+        self.assertFalse(router.check(a, _Connection(lag=100)))
+        router.release(a)
+        b = router.choose()
+        self.assertTrue(router.check(b, _Connection(lag=0)))
+        router.release(b)
+        self.assertEqual(router.choose(), b)
+
+    def test_fall_back_to_primary(self):
+        router = ReplicaRouter([Data(host="a")], max_lag=30)
+        a = router.choose()
+        self.assertFalse(router.check(a, _Connection(lag=None)))  # REPLICATION STOPPED
+        router.release(a)
+        self.assertEqual(router.choose(), None)
+
+
+class _Connection(object):
+    """
+    CONNECTION THAT ONLY ANSWERS SHOW REPLICA STATUS
+    """
+
+    def __init__(self, lag):
+        self.lag = lag
+        self.open = True
+
+    def cursor(self):
+        return _Cursor(self.lag)
+
+
+class _Cursor(object):
+    def __init__(self, lag):
+        self.description = [("Replica_IO_State",), ("Seconds_Behind_Source",)]
+        self.rows = [("Waiting for source to send event", lag)]
+
+    def execute(self, sql):
+        pass
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
@@ -0,0 +1,182 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_dots import Data
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.mysql import MySql
+from jx_mysql.retry import RetryPolicy, is_disconnect, is_read, new_retry
+from tests.fake_mysql import FakeServer
+
+RETRY = {"tries": 3, "base": 0.001}
+
+
+class TestRetryPolicy(FuzzyTestCase):
+    def test_defaults(self):
+        policy = new_retry(True)
+        self.assertEqual((policy.tries, policy.base, policy.budget), (5, 0.5, 10))
+        self.assertEqual(new_retry({"tries": 2}).tries, 2)
+
+    def test_backoff(self):
+        policy = RetryPolicy(tries=10, base=1, max_delay=4, budget=100)
+        for attempt, limit in [(1, 1), (2, 2), (3, 4), (4, 4), (9, 4)]:
+            delay = policy.delay(attempt)
+            self.assertTrue(0 <= delay <= limit)
+
+    def test_tries(self):
+        policy = RetryPolicy(tries=3, budget=100)
+        self.assertTrue(policy.delay(2) is not None)
+        self.assertEqual(policy.delay(3), None)
+
+    def test_budget(self):
+        policy = RetryPolicy(tries=10, budget=2, window=60)
+        self.assertTrue(policy.delay(1) is not None)
+        self.assertTrue(policy.delay(1) is not None)
+        self.assertEqual(policy.delay(1), None)
+
+    def test_budget_window(self):
+        policy = RetryPolicy(tries=10, budget=1, window=0)
+        self.assertTrue(policy.delay(1) is not None)
+        policy.recent[0] -= 1
+        self.assertTrue(policy.delay(1) is not None)
+
+
+class TestClassify(FuzzyTestCase):
+    def test_is_disconnect(self):
+        self.assertTrue(is_disconnect(Exception("(2006, 'MySQL server has gone away')")))
+        self.assertTrue(is_disconnect(Exception("(2013, 'Lost connection to MySQL server during query')")))
+        self.assertTrue(is_disconnect(ConnectionResetError("Connection reset by peer")))
+        self.assertFalse(is_disconnect(Exception("(1062, \"Duplicate entry '1' for key 'PRIMARY'\")")))
+        self.assertFalse(is_disconnect(Exception("(1205, 'Lock wait timeout exceeded')")))
+
+    def test_is_read(self):
+        self.assertTrue(is_read("SELECT 1"))
+        self.assertTrue(is_read("  \n show tables"))
+        self.assertTrue(is_read("# from test\n/* note */ -- more\nWITH a AS (SELECT 1) SELECT * FROM a"))
+        self.assertTrue(is_read("(SELECT 1) UNION (SELECT 2)"))
+        self.assertFalse(is_read("INSERT INTO t SELECT * FROM s"))
+        self.assertFalse(is_read("# SELECT\nDELETE FROM t"))
+        self.assertFalse(is_read("SELECTED"))
+
+
+class TestRetry(FuzzyTestCase):
+    def test_failed_reconnect_uses_an_attempt(self):
+        db = _Db(tries=4, reconnects_fail=2)
+        self.assertEqual(MySql._retry(db, db.call, lambda: True), "done")
+        self.assertEqual((db.calls, db.reconnects), (2, 3))
+
+    def test_give_up_while_reconnecting(self):
+        db = _Db(tries=3, reconnects_fail=10)
+        with self.assertRaises(Exception):
+            MySql._retry(db, db.call, lambda: True)
+        self.assertEqual((db.calls, db.reconnects), (1, 2))
+
+    def test_no_retry_when_not_lost(self):
+        db = _Db(tries=3, reconnects_fail=0, error="(1062, 'Duplicate entry')")
+        with self.assertRaises(Exception):
+            MySql._retry(db, db.call, lambda: True)
+        self.assertEqual((db.calls, db.reconnects), (1, 0))
+
+
+class TestRetryTransaction(FuzzyTestCase):
+    def setUp(self):
+        self.server = FakeServer().__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_lost_during_commit(self):
+        self.server.fail("COMMIT")
+        db = MySql(host="localhost", retry=RETRY)
+        db.run_transaction(lambda t: t.execute("INSERT INTO t VALUES (1)"))
+        self.assertEqual(db.transaction_level, 0)
+        self.assertEqual(
+            [r for r in self.server.requests if r[1] != "SELECT @@max_allowed_packet"],
+            [
+                (0, "INSERT INTO t VALUES (1)"),
+                (0, "COMMIT"),
+                (1, "INSERT INTO t VALUES (1)"),
+                (1, "COMMIT"),
+            ],
+        )
+
+    def test_lost_during_commit_pooled(self):
+        self.server.fail("COMMIT")
+        db = MySql(host="localhost", username="lost commit", pool=True, retry=RETRY)
+        db.run_transaction(lambda t: t.execute("INSERT INTO t VALUES (1)"))
+        self.assertEqual(db.transaction_level, 0)
+        self.assertEqual(self.server.sent, ["INSERT INTO t VALUES (1)", "COMMIT", "INSERT INTO t VALUES (1)", "COMMIT"])
+        self.assertEqual(db.pool.stats().idle, 1)
+
+    def test_read_outside_transaction(self):
+        self.server.result("FROM person", ["id"], [(1,)])
+        self.server.fail("FROM person")
+        db = MySql(host="localhost", retry=RETRY)
+        self.assertEqual(db.query("SELECT id FROM person", format="table").data, [(1,)])
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_first_read_in_transaction(self):
+        self.server.result("FROM person", ["id"], [(1,)])
+        self.server.fail("FROM person")
+        db = MySql(host="localhost", retry=RETRY)
+        with db.transaction():
+            self.assertEqual(db.column_query("SELECT id FROM person"), [(1,)])
+            db.execute("DELETE FROM person")
+        self.assertEqual(self.server.requests[-2:], [(1, "DELETE FROM person"), (1, "COMMIT")])
+
+    def test_later_read_in_transaction(self):
+        # THE SNAPSHOT (AND ANY LOCKS) OF THE FIRST READ ARE GONE WITH THE CONNECTION
+        self.server.result("FROM person", ["id"], [(1,)])
+        db = MySql(host="localhost", retry=RETRY)
+        with self.assertRaises(Exception):
+            with db.transaction():
+                db.query("SELECT id FROM person")
+                self.server.fail("FROM person")
+                db.query("SELECT id FROM person FOR UPDATE")
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_read_after_write_in_transaction(self):
+        self.server.result("FROM person", ["id"], [(1,)])
+        db = MySql(host="localhost", retry=RETRY)
+        with self.assertRaises(Exception):
+            with db.transaction():
+                db.execute("DELETE FROM person WHERE id=2")
+                self.server.fail("FROM person WHERE")
+                db.forall("SELECT id FROM person WHERE id>0", _execute=lambda row: None)
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertNotIn("COMMIT", self.server.sent)
+
+
+class _Db(object):
+    """
+    JUST ENOUGH OF A MySql FOR _retry
+    """
+
+    def __init__(self, tries, reconnects_fail, error="(2006, 'MySQL server has gone away')"):
+        self.retry = RetryPolicy(tries=tries, base=0.001, budget=100)
+        self.settings = Data(host="localhost")
+        self.db = None
+        self.error = error
+        self.reconnects_fail = reconnects_fail
+        self.calls = 0
+        self.reconnects = 0
+
+    def call(self):
+        self.calls += 1
+        if self.calls == 1:
+            raise Exception(self.error)
+        return "done"
+
+    def _reconnect(self):
+        self.reconnects += 1
+        if self.reconnects <= self.reconnects_fail:
+            raise Exception("(2003, \"Can't connect to MySQL server on 'localhost'\")")
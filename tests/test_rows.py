@@ -0,0 +1,74 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import pickle
+from copy import copy, deepcopy
+
+from mo_dots import from_data, is_data, leaves_to_data
+from mo_json import value2json
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.rows import row_maker
+
+COLUMNS = ("id", "name", "a.b", "a.c", "missing")
+VALUES = (1, "x", 2, 3, None)
+
+
+class TestRows(FuzzyTestCase):
+    def test_same_as_data(self):
+        row = row_maker(COLUMNS)(VALUES)
+        expected = leaves_to_data(dict(zip(COLUMNS, VALUES)))
+        self.assertTrue(is_data(row))
+        self.assertEqual(row.id, 1)
+        self.assertEqual(row["name"], "x")
+        self.assertEqual(row["a.b"], 2)
+        self.assertEqual(row.missing, None)
+        self.assertEqual(row.a.c, 3)
+        self.assertEqual(value2json(row), value2json(expected))
+
+    def test_change(self):
+        row = row_maker(COLUMNS)(VALUES)
+        row.a.b = 4
+        row.other = 5
+        self.assertEqual(row, {"id": 1, "name": "x", "a": {"b": 4, "c": 3}, "other": 5})
+
+    def test_copy(self):
+        row = row_maker(COLUMNS)(VALUES)
+        result = copy(row)
+        self.assertFalse(result is row)
+        self.assertEqual(result, row)
+        self.assertEqual(result.a.b, 2)
+
+    def test_deepcopy(self):
+        row = row_maker(COLUMNS)(VALUES)
+        result = deepcopy(row)
+        self.assertEqual(result, {"id": 1, "name": "x", "a": {"b": 2, "c": 3}})
+
+        row.a.b = 4
+        result = deepcopy(row)
+        row.a.b = 5
+        self.assertEqual(result.a.b, 4)
+
+    def test_pickle(self):
+        row = row_maker(COLUMNS)(VALUES)
+        self.assertEqual(pickle.loads(pickle.dumps(row)), row)
+
+    def test_from_data(self):
+        row = row_maker(COLUMNS)(VALUES)
+        result = from_data(row)
+        self.assertTrue(isinstance(result, dict))
+        self.assertEqual(result, {"id": 1, "name": "x", "a": {"b": 2, "c": 3}})
+
+    def test_missing_dunder(self):
+        row = row_maker(COLUMNS)(VALUES)
+        self.assertFalse(hasattr(row, "__html__"))
+        self.assertEqual(row.other, None)
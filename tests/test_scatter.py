@@ -0,0 +1,128 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql import scatter as scatter_module
+from jx_mysql.scatter import BATCH_SIZE, Gather, range_conditions, scatter
+
+
+def condition(sql):
+    return " ".join(str(sql).replace("(", " ").replace(")", " ").split())
+
+
+class TestScatter(FuzzyTestCase):
+    def test_no_ranges(self):
+        self.assertEqual([condition(c) for c in range_conditions("id", [])], ["1"])
+
+    def test_ranges_cover_everything(self):
+        result = [condition(c) for c in range_conditions("id", [10, 20])]
+        self.assertEqual(
+            result,
+            ["id < 10 OR id IS NULL", "id >= 10 AND id < 20", "id >= 20"],
+        )
+
+
+class TestGather(FuzzyTestCase):
+    def setUp(self):
+        self.workers = []
+        self.new_worker = scatter_module._new_worker
+
+        def new_worker(db, snapshot):
+            worker = _Worker()
+            self.workers.append(worker)
+            return worker
+
+        scatter_module._new_worker = new_worker
+
+    def tearDown(self):
+        scatter_module._new_worker = self.new_worker
+
+    def test_ordered(self):
+        gather = Gather(None, "{{shard}}", None, ["a", "b", "c"], True, False, None)
+        self.assertEqual(gather.header, ("id",))
+        expected = [(i,) for i in range(1, 6)] + [(i,) for i in range(100, 100 + 2 * BATCH_SIZE + 5)]
+        self.assertEqual(list(gather), expected)
+        self.assertEqual([w.state for w in self.workers], ["closed"] * 3)
+
+    def test_unordered(self):
+        gather = Gather(None, "{{shard}}", None, ["c", "b", "a"], False, False, None)
+        result = list(gather)
+        expected = [(i,) for i in range(1, 6)] + [(i,) for i in range(100, 100 + 2 * BATCH_SIZE + 5)]
+        self.assertEqual(sorted(result), expected)
+        self.assertEqual([w.state for w in self.workers], ["closed"] * 3)
+
+    def test_format(self):
+        result = scatter(None, "{{shard}}", "id", ranges=[10], format="list")
+        # range_conditions GIVES SHARDS THE WORKERS DO NOT KNOW, SO THEY RETURN NO ROWS
+        self.assertEqual(list(result), [])
+        self.assertEqual(len(self.workers), 2)
+
+    def test_error(self):
+        gather = Gather(None, "{{shard}}", None, ["a", "fail", "b"], True, False, None)
+        with self.assertRaises(Exception):
+            list(gather)
+        self.assertEqual([w.state for w in self.workers], ["closed"] * 3)
+        self.assertEqual(gather.threads, [])
+
+    def test_close_early(self):
+        gather = Gather(None, "{{shard}}", None, ["c", "c"], True, False, None)
+        self.assertEqual(next(gather), (100,))
+        gather.close()
+        self.assertEqual([w.state for w in self.workers], ["closed"] * 2)
+        self.assertEqual(gather.threads, [])
+        self.assertEqual(list(gather), [])
+
+
+DATA = {
+    "a": [(i,) for i in range(1, 3)],
+    "b": [(i,) for i in range(3, 6)],
+    "c": [(i,) for i in range(100, 100 + 2 * BATCH_SIZE + 5)],
+}
+
+
+class _Worker(object):
+    """
+    JUST ENOUGH OF A MySql FOR Gather
+    """
+
+    def __init__(self):
+        self.state = "new"
+        self.db = self
+
+    def begin(self):
+        self.state = "begin"
+
+    def query(self, sql, param=None, stream=False, format=None):
+        if sql == "fail":
+            raise Exception("expected failure")
+        return {"header": ("id",), "data": _Rows(DATA.get(sql, []))}
+
+    def rollback(self):
+        self.state = "rollback"
+
+    def close(self):
+        self.state = "closed"
+
+
+class _Rows(object):
+    def __init__(self, rows):
+        self.rows = iter(rows)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.rows)
+
+    def close(self):
+        pass
@@ -0,0 +1,80 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.script import split_sql
+
+
+def split(text):
+    return list(split_sql(text.splitlines(True)))
+
+
+class TestScript(FuzzyTestCase):
+    def test_simple(self):
+        self.assertEqual(split("SELECT 1;\nSELECT 2;\n"), ["SELECT 1", "SELECT 2"])
+
+    def test_no_final_delimiter(self):
+        self.assertEqual(split("SELECT 1;\nSELECT 2\n"), ["SELECT 1", "SELECT 2"])
+
+    def test_quotes(self):
+        result = split(
+            "INSERT INTO t VALUES ('a;b', 'it''s;', \"c\\\";\", `d;e`);\nSELECT 1;"
+        )
+        self.assertEqual(
+            result,
+            ["INSERT INTO t VALUES ('a;b', 'it''s;', \"c\\\";\", `d;e`)", "SELECT 1"],
+        )
+
+    def test_multiline_string(self):
+        self.assertEqual(
+            split("INSERT INTO t VALUES ('a;\n  b');\nSELECT 1;"),
+            ["INSERT INTO t VALUES ('a;\n  b')", "SELECT 1"],
+        )
+
+    def test_comments(self):
+        result = split(
+            "-- comment;\n"
+            "# comment;\n"
+            "SELECT 1 /* comment; */ + 1; -- trailing;\n"
+            "SELECT 2--1;\n"
+        )
+        self.assertEqual(result, ["SELECT 1   + 1", "SELECT 2--1"])
+
+    def test_executable_comments(self):
+        result = split("/*!40101 SET NAMES utf8; */;\nSELECT /*+ MAX_EXECUTION_TIME(10) */ 1;")
+        self.assertEqual(
+            result, ["/*!40101 SET NAMES utf8; */", "SELECT /*+ MAX_EXECUTION_TIME(10) */ 1"]
+        )
+
+    def test_delimiter(self):
+        result = split(
+            "DELIMITER ;;\n"
+            "CREATE PROCEDURE p() BEGIN SELECT 1; SELECT 2; END;;\n"
+            "DELIMITER ;\n"
+            "CALL p();\n"
+        )
+        self.assertEqual(
+            result, ["CREATE PROCEDURE p() BEGIN SELECT 1; SELECT 2; END", "CALL p()"]
+        )
+
+    def test_unclosed_quote(self):
+        with self.assertRaises(Exception):
+            split("SELECT 'abc;\n")
+
+    def test_lines_are_read_as_needed(self):
+        def lines():
+            yield "SELECT 1;\n"
+            raise Exception("read too far")
+
+        statements = split_sql(lines())
+        self.assertEqual(next(statements), "SELECT 1")
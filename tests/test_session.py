@@ -0,0 +1,90 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql import mysql
+from jx_mysql.mysql import MySql, _session_change
+from tests.fake_mysql import FakeServer
+
+
+class TestSessionChange(FuzzyTestCase):
+    def test_changes(self):
+        for sql in [
+            "USE `test`",
+            "DROP DATABASE test",
+            "SET TIME_ZONE='+01:00'",
+            "SET @@session.time_zone='+01:00'",
+            "SET SESSION max_execution_time=5",
+            "SET @a=1, time_zone='+01:00'",
+            "# from test\nSET MAX_EXECUTION_TIME=1",
+        ]:
+            self.assertTrue(_session_change.match(sql), sql)
+
+    def test_not_changes(self):
+        for sql in [
+            "SET @jx_param0=1, @jx_param1='a'",
+            "SET @time_zone=1",
+            "SET NAMES utf8",
+            "# USE\nSELECT 1",
+            "UPDATE t SET time_zone=1",
+        ]:
+            self.assertFalse(_session_change.match(sql), sql)
+
+
+class TestSessionRestored(FuzzyTestCase):
+    def setUp(self):
+        self.server = FakeServer().__enter__()
+        self.server.result("FROM person", ["id"], [(1,)])
+        # EVERYTHING _set_session() SENDS WHEN THE SESSION IS NOT KNOWN
+        self.restore = ["USE test", "SET TIME_ZONE='+00:00'", "SET MAX_EXECUTION_TIME=" + str(mysql.EXECUTE_TIMEOUT)]
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def sent_since(self, sql):
+        sent = self.server.sent
+        return sent[sent.index(sql):]
+
+    def test_query(self):
+        db = MySql(host="localhost", schema="test")
+        db.query("USE other")
+        db.query("SELECT id FROM person")
+        self.assertEqual(self.sent_since("USE other"), ["USE other"] + self.restore + ["SELECT id FROM person"])
+
+    def test_column_query(self):
+        db = MySql(host="localhost", schema="test")
+        db.column_query("SET time_zone='+01:00'")
+        db.column_query("SELECT id FROM person")
+        self.assertEqual(self.sent_since("SET time_zone='+01:00'"), ["SET time_zone='+01:00'"] + self.restore + ["SELECT id FROM person"])
+
+    def test_stream(self):
+        db = MySql(host="localhost", schema="test", username="stream session", pool=True)
+        list(db.query("USE other", stream=True))
+        db.query("SELECT id FROM person")
+        self.assertEqual(
+            self.sent_since("USE other"),
+            ["USE other", "ROLLBACK"] + self.restore + ["SELECT id FROM person", "ROLLBACK"],
+        )
+
+    def test_transaction(self):
+        db = MySql(host="localhost", schema="test")
+        with db.transaction():
+            db.query("USE other")
+            # THE TRANSACTION CONTINUES ON other
+            db.query("SELECT id FROM person")
+        with db.transaction():
+            db.query("SELECT id FROM person")
+        self.assertEqual(
+            self.sent_since("USE other"),
+            ["USE other", "SELECT id FROM person", "COMMIT"] + self.restore + ["SELECT id FROM person", "COMMIT"],
+        )
@@ -0,0 +1,86 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from mo_dots import is_data
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql.mysql import MySql
+from tests.fake_mysql import FakeServer
+
+ROWS = [(i, "name" + str(i)) for i in range(10)]
+
+
+class TestStream(FuzzyTestCase):
+    def setUp(self):
+        self.server = FakeServer().__enter__()
+        self.server.result("FROM person", ["id", "name"], ROWS)
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_formats(self):
+        db = MySql(host="localhost")
+        result = db.query("SELECT id, name FROM person", stream=True, format="table")
+        self.assertTrue(is_data(result))
+        self.assertEqual(result.header, ("id", "name"))
+        self.assertEqual(list(result.data), ROWS)
+
+        result = db.query("SELECT id, name FROM person", stream=True, format="list")
+        self.assertEqual(next(result), {"id": 0, "name": "name0"})
+        result.close()
+
+        result = db.query("SELECT id, name FROM person", stream=True)
+        self.assertEqual([r.name for r in result], [name for _, name in ROWS])
+
+    def test_open_stream_guard(self):
+        db = MySql(host="localhost")
+        with db.transaction():
+            result = db.query("SELECT id, name FROM person", stream=True)
+            next(result)
+            with self.assertRaises(Exception):
+                db.query("SELECT 1")
+            # WRITES WAIT IN THE BACKLOG UNTIL THE STREAM IS CLOSED
+            db.execute("DELETE FROM person")
+            self.assertNotIn("DELETE FROM person", self.server.sent)
+            result.close()
+        self.assertEqual(self.server.sent[-2:], ["DELETE FROM person", "COMMIT"])
+
+    def test_close_early(self):
+        db = MySql(host="localhost")
+        with db.transaction():
+            with db.query("SELECT id, name FROM person", stream=True) as result:
+                self.assertEqual(next(result).id, 0)
+            # THE CONNECTION CAN BE USED AGAIN
+            self.assertEqual(len(db.query("SELECT id, name FROM person")), len(ROWS))
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_pooled_close_early_discards(self):
+        db = MySql(host="localhost", username="close early", pool=True)
+        result = db.query("SELECT id, name FROM person", stream=True)
+        next(result)
+        result.close()
+        connection = self.server.connections[0]
+        self.assertFalse(connection.open)
+        self.assertEqual(db.pool.stats().idle, 0)
+
+        # THE NEXT QUERY USES A NEW CONNECTION
+        self.assertEqual(len(db.query("SELECT id, name FROM person")), len(ROWS))
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_pooled_exhausted_is_returned(self):
+        db = MySql(host="localhost", username="exhausted", pool=True)
+        result = db.query("SELECT id, name FROM person", stream=True)
+        self.assertEqual(len(list(result)), len(ROWS))
+        connection = self.server.connections[0]
+        self.assertTrue(connection.open)
+        self.assertEqual(self.server.sent[-1], "ROLLBACK")
+        self.assertEqual(db.pool.stats().idle, 1)
@@ -0,0 +1,119 @@
+# encoding: utf-8
+#
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import tempfile
+from hashlib import sha256
+
+from mo_dots import Data
+from mo_testing.fuzzytestcase import FuzzyTestCase
+
+from jx_mysql import tls
+from jx_mysql.tls import get_ssl_context
+
+URL = "https://example.com/certs/ca.pem"
+with open("tests/resources/ca.pem", "rb") as _file:
+    PEM = _file.read()
+# SAME CERTIFICATE, DIFFERENT BYTES
+OTHER_PEM = b"# REISSUED\n" + PEM
+
+
+class TestTls(FuzzyTestCase):
+    def setUp(self):
+        self.old = tls.http, tls.PEM_DIRECTORY, tls.contexts
+        self.http = tls.http = _Http(PEM)
+        self.directory = tls.PEM_DIRECTORY = tempfile.mkdtemp()
+        tls.contexts = {}
+
+    def tearDown(self):
+        tls.http, tls.PEM_DIRECTORY, tls.contexts = self.old
+
+    def pem_file(self):
+        return os.path.join(self.directory, "example.com")
+
+    def test_shared(self):
+        context = get_ssl_context(Data(pem=URL))
+        self.assertTrue(get_ssl_context(Data(pem=URL)) is context)
+        self.assertEqual(self.http.gets, [URL])
+        with open(self.pem_file(), "rb") as file:
+            self.assertEqual(file.read(), PEM)
+
+    def test_cached_pem_on_disk(self):
+        with open(self.pem_file(), "wb") as file:
+            file.write(PEM)
+        get_ssl_context(Data(pem=URL))
+        self.assertEqual(self.http.gets, [])
+
+    def test_stale_pem_on_disk(self):
+        with open(self.pem_file(), "wb") as file:
+            file.write(PEM)
+        old = os.path.getmtime(self.pem_file()) - 100
+        os.utime(self.pem_file(), (old, old))
+        get_ssl_context(Data(pem=URL, ttl=50))
+        self.assertEqual(self.http.gets, [URL])
+
+    def test_ttl_reload(self):
+        context = get_ssl_context(Data(pem=URL, ttl=0))
+        # SAME CONTENT, SO SAME CONTEXT (AND ITS TLS SESSIONS)
+        self.assertTrue(get_ssl_context(Data(pem=URL, ttl=0)) is context)
+        self.assertEqual(len(self.http.gets), 2)
+
+        self.http.content = OTHER_PEM
+        other = get_ssl_context(Data(pem=URL, ttl=0))
+        self.assertFalse(other is context)
+        self.assertEqual(len(self.http.gets), 3)
+
+    def test_not_expired(self):
+        context = get_ssl_context(Data(pem=URL, ttl=60))
+        self.http.content = OTHER_PEM
+        self.assertTrue(get_ssl_context(Data(pem=URL, ttl=60)) is context)
+        self.assertEqual(len(self.http.gets), 1)
+
+    def test_sha256(self):
+        get_ssl_context(Data(pem=URL, sha256=sha256(PEM).hexdigest()))
+        self.assertEqual(len(self.http.gets), 1)
+
+    def test_sha256_mismatch(self):
+        with self.assertRaises(Exception) as context:
+            get_ssl_context(Data(pem=URL, sha256="0" * 64))
+        self.assertIn("has sha256", context.exception)
+        self.assertEqual(tls.contexts, {})
+
+    def test_sha256_mismatch_on_disk(self):
+        # THE COPY ON DISK IS NOT TRUSTED WHEN IT DOES NOT MATCH
+        with open(self.pem_file(), "wb") as file:
+            file.write(OTHER_PEM)
+        get_ssl_context(Data(pem=URL, sha256=sha256(PEM).hexdigest()))
+        self.assertEqual(self.http.gets, [URL])
+        with open(self.pem_file(), "rb") as file:
+            self.assertEqual(file.read(), PEM)
+
+    def test_not_a_pem(self):
+        self.http.content = b"<html>Not Found</html>"
+        with self.assertRaises(Exception) as context:
+            get_ssl_context(Data(pem=URL))
+        self.assertIn("Expecting PEM certificate", context.exception)
+        self.assertFalse(os.path.exists(self.pem_file()))
+
+
+class _Http(object):
+    """
+    STANDS IN FOR mo_http.http, SO NO CERTIFICATE IS DOWNLOADED
+    """
+
+    def __init__(self, content):
+        self.content = content
+        self.gets = []
+
+    def get(self, url):
+        self.gets.append(url)
+        return Data(content=self.content)